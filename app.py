@@ -0,0 +1,61 @@
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.methods import DeleteWebhook
+
+from config_data.config import load_config
+from keyboards.set_commands import set_commands
+from handlers import commands, handlers, state_handlers
+from database.db_class import DataBase
+from parsers.driver_pool import driver_pool_shutdown
+from parsers.http_fetcher import http_session_shutdown
+from parsers.result_cache import search_cache, search_cache_shutdown
+from utils.expiry import expiry_scheduler, expiry_shutdown
+from utils.metrics import metrics_shutdown
+from utils.utils import executor_shutdown
+
+# Load configuration from the '.env' file
+config = load_config('.env')
+
+# Initialize the Dispatcher
+dp = Dispatcher()
+# Talk to a self-hosted Bot API server if one is configured
+session = (
+    AiohttpSession(api=TelegramAPIServer.from_base(config.tg_bot.api_server)) if config.tg_bot.api_server else None
+)
+# Initialize the Bot
+bot = Bot(config.tg_bot.token, session=session, parse_mode='HTML')
+# Initialize the connection to the database
+db = DataBase(config.db_config.database)
+
+
+async def main() -> None:
+    # Open the database connections and create the tables if they don't exist
+    await db.create_db()
+    # Create the search cache table if it doesn't exist
+    await search_cache.create()
+    # Include handlers into the dispatcher
+    dp.include_routers(commands.command_router, handlers.router, state_handlers.form_router)
+    # Start deleting expired info panels in the background
+    await expiry_scheduler.start(bot, db)
+    # Register the expiry shutdown first to stop deleting panels before the database is closed
+    dp.shutdown.register(expiry_shutdown)
+    # Register the executor shutdown to be called on dispatcher shutdown
+    dp.shutdown.register(executor_shutdown)
+    # Register the driver pool shutdown to quit all warm browsers after the executor has stopped
+    dp.shutdown.register(driver_pool_shutdown)
+    # Register the HTTP session shutdown for the fast path fetcher
+    dp.shutdown.register(http_session_shutdown)
+    # Register the search cache shutdown to log its hit and miss counters
+    dp.shutdown.register(search_cache_shutdown)
+    # Register the database shutdown to close its connections
+    dp.shutdown.register(db.close)
+    # Register the metrics shutdown last to log the counters, scrape concurrency and breaker state of the whole run
+    dp.shutdown.register(metrics_shutdown)
+    # Set the bot commands
+    await set_commands(bot)
+    # Remove any existing webhook to switch to polling
+    await bot(DeleteWebhook(drop_pending_updates=True))
+    # Start polling for updates from Telegram
+    await dp.start_polling(bot, db=db)
+
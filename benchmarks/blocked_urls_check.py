@@ -0,0 +1,46 @@
+import re
+import sys
+
+from benchmarks.fixtures import generate_hotels
+from parsers.driver_pool import LEAN_BLOCKED_URLS
+
+
+# Requests of a Booking.com search page the lean profile must not download
+BLOCKED_REQUESTS = [hotel['Photo'] for hotel in generate_hotels('Paris', 3)] + [
+    'https://cf.bstatic.com/xdata/images/hotel/max1024x768/123456789.webp?k=5f1c0e&o=&hp=1',
+    'https://cf.bstatic.com/static/img/favicon/9ca83ba2a5a3293ff07452cb24949a5843af4592.svg',
+    'https://cf.bstatic.com/psb/capla/static/media/booking-sans-regular.woff2?v=2',
+    'https://cf.bstatic.com/psb/capla/static/media/hero.mp4?t=1',
+    'https://www.google-analytics.com/g/collect?v=2&tid=G-0000000000',
+    'https://www.googletagmanager.com/gtm.js?id=GTM-0000000'
+]
+
+# Requests the page needs to show the search results
+ALLOWED_REQUESTS = [
+    'https://www.booking.com/searchresults.html?ss=Paris&offset=25',
+    'https://www.booking.com/dml/graphql?lang=en-us',
+    'https://cf.bstatic.com/psb/capla/static/js/searchresults.3f2c1a9b.js',
+    'https://cf.bstatic.com/psb/capla/static/css/searchresults.8d41e2.css?v=1'
+]
+
+
+# Function to check a URL against a pattern of Network.setBlockedURLs, where only '*' is a wildcard and the pattern
+# has to match the whole URL
+def is_blocked(url: str) -> bool:
+    return any(
+        re.fullmatch('.*'.join(re.escape(part) for part in pattern.split('*')), url) for pattern in LEAN_BLOCKED_URLS
+    )
+
+
+def main() -> None:
+    failures = [f'not blocked: {url}' for url in BLOCKED_REQUESTS if not is_blocked(url)]
+    failures += [f'blocked: {url}' for url in ALLOWED_REQUESTS if is_blocked(url)]
+    for failure in failures:
+        print(failure)
+    print('blocked URLs: ' + ('FAILED' if failures else 'ok'))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from selenium import webdriver
+
+from benchmarks.fixtures import CORPUS_DIR, PAGES_DIR, generate_hotels, render_property_card, render_search_page
+from benchmarks.parser_benchmark import get_commit
+from parsers.driver_pool import create_driver
+from parsers.extractors import extract_hotels_bs4, parse_price, parse_rating
+
+
+# Script collecting the raw name, price, rating, photo and link of every property card in the browser, using the same
+# elements as the page source extractors. The bot doesn't use it until this check has passed with a real Chrome
+CARD_EXTRACTION_SCRIPT = """
+const text = (card, selector) => {
+    const element = card.querySelector(selector);
+    return element ? element.textContent : null;
+};
+const attribute = (card, selector, name) => {
+    const element = card.querySelector(selector);
+    return element ? element.getAttribute(name) : null;
+};
+return Array.from(document.querySelectorAll('div[data-testid="property-card"]'), card => [
+    text(card, 'div[data-testid="title"]'),
+    text(card, 'span[data-testid="price-and-discounted-price"]'),
+    text(card, 'div[data-testid="review-score"]'),
+    attribute(card, 'img', 'src'),
+    attribute(card, 'a', 'href')
+]);
+"""
+
+
+# Function to extract hotels in the browser and convert the raw values with the same rules as the extractors,
+# skipping cards without a name, price, photo or link, which the page source extractors would fail on
+def extract_hotels_in_browser(driver: webdriver.Chrome) -> list[dict]:
+    return [
+        {
+            'Name': name,
+            'Price': parse_price(price),
+            'Rating': parse_rating(rating),
+            'Photo': photo,
+            'Link': link
+        } for name, price, rating, photo, link in driver.execute_script(CARD_EXTRACTION_SCRIPT)
+        if name is not None and price is not None and photo is not None and link is not None
+    ]
+
+
+# Function to save a search page with one complete card, one card without a photo and one without a link
+def save_incomplete_page(work_dir: Path) -> tuple[Path, list[str]]:
+    hotels = generate_hotels('Paris', 3)
+    cards = [render_property_card(hotel) for hotel in hotels]
+    cards[1] = re.sub(r'<img\b', '<span', cards[1])
+    cards[2] = re.sub(r'<a\b', '<span', cards[2])
+    path = work_dir / 'incomplete.html'
+    path.write_text(render_search_page('Paris', cards), encoding='utf-8')
+    return path, [hotels[0]['Name']]
+
+
+# Function to compare in-browser extraction with the BeautifulSoup reference on the saved pages and the corpus, and
+# check that cards the reference would fail on are skipped
+def main(output: Optional[Path]) -> None:
+    driver = create_driver()
+    report = {'commit': get_commit(), 'browser': driver.capabilities.get('browserVersion'), 'pages': {}}
+    try:
+        for path in sorted(PAGES_DIR.glob('*.html')) + sorted(CORPUS_DIR.glob('*.html')):
+            page_source = path.read_text(encoding='utf-8')
+            driver.get(path.resolve().as_uri())
+
+            # Compare the records and the amount of data copied from the browser in both modes
+            browser_hotels = extract_hotels_in_browser(driver)
+            reference_hotels = extract_hotels_bs4(page_source)
+            page_source_bytes = len(driver.page_source)
+            script_bytes = len(json.dumps(driver.execute_script(CARD_EXTRACTION_SCRIPT)))
+
+            matches = browser_hotels == reference_hotels
+            report['pages'][f'{path.parent.name}/{path.name}'] = {
+                'match': matches,
+                'hotels': len(browser_hotels),
+                'page_source_bytes': page_source_bytes,
+                'script_bytes': script_bytes
+            }
+            print(
+                f'{path.parent.name}/{path.name}: {"match" if matches else "MISMATCH"}, {len(browser_hotels)} hotels, '
+                f'page_source {page_source_bytes / 1024:.1f} KiB, script {script_bytes / 1024:.1f} KiB'
+            )
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            path, expected_names = save_incomplete_page(Path(work_dir))
+            driver.get(path.resolve().as_uri())
+            names = [hotel['Name'] for hotel in extract_hotels_in_browser(driver)]
+        report['incomplete_cards_skipped'] = names == expected_names
+        print(f'incomplete cards: {"skipped" if names == expected_names else f"WRONG, got {names}"}')
+    finally:
+        driver.quit()
+
+    report['parity'] = report['incomplete_cards_skipped'] and all(page['match'] for page in report['pages'].values())
+    if output:
+        output.write_text(json.dumps(report, indent=1), encoding='utf-8')
+    if not report['parity']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check in-browser extraction against the page source extractors')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    args = parser.parse_args()
+    main(args.output)
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import web
+
+from benchmarks.fixtures import generate_hotels, render_property_card, render_search_page
+from benchmarks.parser_benchmark import get_commit
+from parsers.booking_parser import NETWORK_STATS_SCRIPT, wait_for_cards
+from parsers.driver_pool import create_driver
+from utils.utils import executor_shutdown, run_in_executor
+
+
+# Sizes of the assets the test page loads, about what a Booking.com search page loads per card
+PHOTO_BYTES = 40 * 1024
+FONT_BYTES = 100 * 1024
+SCRIPT_BYTES = 200 * 1024
+
+
+# Function to create a web application serving a search page whose photos, font and script are loaded from the same
+# server, with query strings like the ones on Booking.com
+def create_app(cards: int) -> web.Application:
+    hotels = [
+        {**hotel, 'Photo': f'/xdata/images/hotel/square600/{number}.jpg?k={number:x}&o='}
+        for number, hotel in enumerate(generate_hotels('Paris', cards))
+    ]
+    page = render_search_page('Paris', [render_property_card(hotel) for hotel in hotels]).replace(
+        '</head>',
+        '<style>@font-face {font-family: "Booking Sans"; src: url("/static/fonts/sans.woff2?v=2")}'
+        'body {font-family: "Booking Sans"}</style><script src="/static/js/searchresults.js"></script></head>'
+    )
+
+    async def search_results(_: web.Request) -> web.Response:
+        return web.Response(text=page, content_type='text/html')
+
+    async def asset(request: web.Request) -> web.Response:
+        size, content_type = {
+            'jpg': (PHOTO_BYTES, 'image/jpeg'),
+            'woff2': (FONT_BYTES, 'font/woff2'),
+            'js': (SCRIPT_BYTES, 'application/javascript')
+        }[request.path.rsplit('.', 1)[-1]]
+        body = b'//' + b' ' * (size - 2) if content_type == 'application/javascript' else b'\0' * size
+        return web.Response(body=body, content_type=content_type)
+
+    app = web.Application()
+    app.router.add_get('/searchresults.html', search_results)
+    app.router.add_get('/xdata/images/hotel/square600/{name}', asset)
+    app.router.add_get('/static/{kind}/{name}', asset)
+    return app
+
+
+# Function to load the page with a new browser of the given profile and return the transferred bytes and load time
+def load_page(profile: str, url: str) -> tuple[int, float]:
+    driver = create_driver(profile)
+    try:
+        driver.get(url)
+        wait_for_cards(driver)
+        network_bytes, page_load = driver.execute_script(NETWORK_STATS_SCRIPT)
+    finally:
+        driver.quit()
+    return network_bytes, page_load / 1000
+
+
+async def main(cards: int, url: Optional[str], output: Optional[Path]) -> None:
+    runner = None
+    if url is None:
+        runner = web.AppRunner(create_app(cards), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/searchresults.html'
+
+    report = {'commit': get_commit(), 'url': url, 'profiles': {}}
+    try:
+        for profile in ('full', 'lean'):
+            network_bytes, page_load = await run_in_executor(load_page, profile, url)
+            report['profiles'][profile] = {'network_bytes': network_bytes, 'page_load_seconds': page_load}
+            print(f'{profile:>4}: transferred {network_bytes / 1024:8.1f} KiB, page load {page_load:.2f}s')
+    finally:
+        await executor_shutdown()
+        if runner is not None:
+            await runner.cleanup()
+
+    full, lean = report['profiles']['full'], report['profiles']['lean']
+    print(f'lean profile transfers {1 - lean["network_bytes"] / max(full["network_bytes"], 1):.0%} less')
+    if output:
+        output.write_text(json.dumps(report, indent=1), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the bytes the lean and full browser profiles download')
+    parser.add_argument('--cards', type=int, default=25, help='Property cards on the local test page')
+    parser.add_argument('--url', help='Load this search URL instead of the local test page')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    args = parser.parse_args()
+    asyncio.run(main(args.cards, args.url, args.output))
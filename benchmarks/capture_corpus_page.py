@@ -0,0 +1,85 @@
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from lxml import html
+
+from benchmarks.fixtures import CORPUS_DIR
+from parsers.booking_parser import fetch_page_source
+from parsers.driver_pool import driver_pool
+from parsers.extractors import CARD_TITLE, PROPERTY_CARDS, extract_hotels_bs4
+
+
+# Query parameters of Booking.com links that identify the visitor or the session
+SESSION_PARAMETERS = re.compile(r'([?&;](?:aid|label|sid|srpvid|dest_id|k)=)[^&;"\'\s<]*')
+
+# Hotel photos on the Booking.com image server, the file name is the photo id
+PHOTO_ID = re.compile(r'(/xdata/images/hotel/[^/]+/)\d+(\.\w+)')
+
+
+# Function to replace the name, links and photos of every property card with numbered placeholders and blank the session
+# parameters of the whole page, keeping the markup of the page as it is
+def anonymize_page(page_source: str, destination: str) -> str:
+    tree = html.document_fromstring(page_source)
+    slug = destination.lower().replace(' ', '-')
+    for number, card in enumerate(PROPERTY_CARDS(tree), start=1):
+        for title in CARD_TITLE(card):
+            for child in title:
+                title.remove(child)
+            title.text = f'Hotel {destination} {number}'
+        for link in card.iter('a'):
+            if link.get('href'):
+                parts = urlsplit(link.get('href'))
+                link.set('href', urlunsplit((
+                    parts.scheme, parts.netloc, f'/hotel/xx/{slug}-{number}.html', parts.query, parts.fragment
+                )))
+        for image in card.iter('img'):
+            if image.get('src'):
+                image.set('src', PHOTO_ID.sub(rf'\g<1>{number}\g<2>', image.get('src')))
+            # Alt texts repeat the hotel name
+            if image.get('alt'):
+                image.set('alt', f'Hotel {destination} {number}')
+    page_source = html.tostring(tree, encoding='unicode', doctype=tree.getroottree().docinfo.doctype)
+    return SESSION_PARAMETERS.sub(r'\1x', page_source)
+
+
+# Function to save an anonymized search page to the corpus together with the hotels the reference extractor finds on it,
+# the hotels have to be checked by hand against the page in a browser before the page is committed
+def save_captured_page(page_source: str, name: str, destination: str) -> Path:
+    page_source = anonymize_page(page_source, destination)
+    hotels = extract_hotels_bs4(page_source)
+    path = CORPUS_DIR / f'captured-{name}.html'
+    path.write_text(page_source, encoding='utf-8')
+    path.with_suffix('.json').write_text(json.dumps(hotels, ensure_ascii=False, indent=1), encoding='utf-8')
+    print(f'{path}: {len(page_source) / 1024:.1f} KiB, {len(hotels)} hotels')
+    return path
+
+
+# Function to load a search page from Booking.com with the Selenium parser
+def capture_page(destination: str, check_in: str, check_out: str, order_by: str) -> Optional[str]:
+    try:
+        return fetch_page_source(destination, check_in, check_out, 2, 1, 0, [], order_by, load_more_clicks=0)
+    finally:
+        driver_pool.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add an anonymized real Booking.com search page to the parser corpus')
+    parser.add_argument('name', help='Name of the page in the corpus, saved as captured-<name>.html')
+    parser.add_argument('destination')
+    parser.add_argument('--file', type=Path, help='Page saved from a browser, instead of loading it with Selenium')
+    parser.add_argument('--check-in', help='Check-in date as YYYY-MM-DD, when loading the page with Selenium')
+    parser.add_argument('--check-out', help='Check-out date as YYYY-MM-DD, when loading the page with Selenium')
+    parser.add_argument('--order-by', default='popularity')
+    args = parser.parse_args()
+
+    if args.file:
+        source = args.file.read_text(encoding='utf-8')
+    else:
+        source = capture_page(args.destination, args.check_in, args.check_out, args.order_by)
+    if not source:
+        raise SystemExit('The search page could not be loaded')
+    save_captured_page(source, args.name, args.destination)
@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from benchmarks.fixtures import generate_hotels
+from benchmarks.parser_benchmark import get_commit
+from database.db_class import DataBase
+
+
+# Form values stored with every generated info panel
+FORM_VALUES = ('Paris', '2030-06-01', '2030-06-03', 2, 1, 1, 'popularity', [8])
+
+
+# Function to fill the database with info panels of several users and return their user and message ids
+async def fill_database(db: DataBase, users: int, panels_per_user: int, hotels: int) -> list[tuple[int, int]]:
+    panels = []
+    hotels_info = generate_hotels('Paris', hotels)
+    now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+    for user_id in range(1, users + 1):
+        for message_id in range(1, panels_per_user + 1):
+            await db.insert_user_data(user_id, message_id, len(hotels_info), now, hotels_info, *FORM_VALUES)
+            panels.append((user_id, message_id))
+    return panels
+
+
+# Function to time a database call several times and return the per-call latencies in seconds
+async def time_calls(call: Callable[[], Awaitable[Any]], calls: int) -> list[float]:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+# Function to measure the calls the handlers make most often, one at a time and many at once
+async def measure(db: DataBase, panels: list[tuple[int, int]], hotels: int, calls: int) -> dict[str, Any]:
+    rng = random.Random(0)
+    hotels_info = generate_hotels('Berlin', hotels)
+    now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+
+    # Function to pick a random info panel
+    def pick() -> tuple[int, int]:
+        return rng.choice(panels)
+
+    # A navigation click reads the info panel and then moves it to another hotel
+    async def navigate() -> None:
+        info_panel = await db.get_info_panel(*pick())
+        await db.update_position_get_hotel(info_panel['info_panel_id'], rng.randint(1, hotels))
+
+    scenarios = {
+        'get_info_panel': lambda: db.get_info_panel(*pick()),
+        'navigation_click': navigate,
+        'get_form_info_panel': lambda: db.get_form_info_panel(*pick()),
+        'get_all_forms_info_panels': lambda: db.get_all_forms_info_panels(pick()[0]),
+        'update_hotels_info_panel': lambda: db.update_hotels_info_panel(
+            rng.randint(1, len(panels)), hotels_info, len(hotels_info), now
+        )
+    }
+
+    results = {}
+    for name, call in scenarios.items():
+        timings = sorted(await time_calls(call, calls))
+        results[name] = {
+            'median_us': statistics.median(timings) * 1e6,
+            'p99_us': timings[min(len(timings) - 1, round(len(timings) * 0.99) - 1)] * 1e6
+        }
+
+    # Many users clicking at the same time
+    start = time.perf_counter()
+    await asyncio.gather(*(navigate() for _ in range(calls)))
+    results['concurrent_navigation_clicks_per_second'] = calls / (time.perf_counter() - start)
+    return results
+
+
+async def main(users: int, panels_per_user: int, hotels: int, calls: int, output: Optional[Path],
+               compare: Optional[Path]) -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DataBase(str(Path(work_dir) / 'bot.db'))
+        await db.create_db()
+        panels = await fill_database(db, users, panels_per_user, hotels)
+        results = await measure(db, panels, hotels, calls)
+        await db.close()
+
+    report = {'commit': get_commit(), 'calls': calls, 'panels': len(panels), 'results': results}
+    baseline = json.loads(compare.read_text(encoding='utf-8')) if compare else None
+    for name, result in results.items():
+        if not isinstance(result, dict):
+            continue
+        line = f'{name:<28} median {result["median_us"]:8.0f} µs   p99 {result["p99_us"]:8.0f} µs'
+        if baseline and name in baseline['results']:
+            line += f'   median {result["median_us"] / baseline["results"][name]["median_us"] - 1:+7.1%}'
+        print(line)
+    print(f'concurrent navigation clicks: {results["concurrent_navigation_clicks_per_second"]:.0f}/s')
+    if baseline:
+        print(f'compared with {baseline.get("commit")}: '
+              f'{baseline["results"]["concurrent_navigation_clicks_per_second"]:.0f}/s')
+
+    if output:
+        output.write_text(json.dumps(report, indent=1), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure per-call latency of the bot database')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--panels', type=int, default=6, help='Info panels of every user')
+    parser.add_argument('--hotels', type=int, default=75, help='Hotels in every info panel')
+    parser.add_argument('--calls', type=int, default=500, help='Calls of every kind')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--compare', type=Path, help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.panels, args.hotels, args.calls, args.output, args.compare))
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import datetime
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.fixtures import generate_hotels
+from database.db_class import DataBase
+
+
+# Function to create info panels for several users, every form with the given number of children
+async def fill_database(db: DataBase, users: int, panels_per_user: int, children: int) -> None:
+    hotels_info = generate_hotels('Paris', 25)
+    now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+    children_age = [age % 18 for age in range(children)]
+    for user_id in range(1, users + 1):
+        for message_id in range(1, panels_per_user + 1):
+            await db.insert_user_data(
+                user_id, message_id, len(hotels_info), now, hotels_info,
+                'Paris', '2030-06-01', '2030-06-03', 2, children, 1, 'popularity', children_age
+            )
+
+
+# Function to measure a listing method: median latency and the number of SQL statements a single call runs
+async def measure_call(db: DataBase, name: str, *args: Any, calls: int) -> dict[str, float]:
+    statements = []
+    await db.reader.set_trace_callback(statements.append)
+    await getattr(db, name)(*args)
+    await db.reader.set_trace_callback(None)
+
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await getattr(db, name)(*args)
+        timings.append(time.perf_counter() - start)
+    return {'statements': len(statements), 'median_us': statistics.median(timings) * 1e6}
+
+
+async def main(users: int, children: int, calls: int) -> None:
+    # The number of statements must not grow with the number of panels of a user
+    for panels_per_user in (1, 6):
+        with tempfile.TemporaryDirectory() as work_dir:
+            db = DataBase(str(Path(work_dir) / 'bot.db'))
+            await db.create_db()
+            await fill_database(db, users, panels_per_user, children)
+            for name, args in (
+                ('get_all_forms_info_panels', (1,)),
+                ('get_user_details', (1,)),
+                ('get_form_info_panel', (1, 1))
+            ):
+                result = await measure_call(db, name, *args, calls=calls)
+                print(
+                    f'{panels_per_user} panel(s) {name:<27} {result["statements"]:>3} statements, '
+                    f'median {result["median_us"]:7.0f} µs'
+                )
+            await db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check that the form listing queries do not grow with the panels')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--children', type=int, default=10, help='Children in every form')
+    parser.add_argument('--calls', type=int, default=500, help='Calls of every method')
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.children, args.calls))
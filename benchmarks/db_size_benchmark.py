@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from benchmarks.fixtures import generate_hotels
+from benchmarks.parser_benchmark import get_commit
+from database.db_class import DataBase
+
+
+# Destinations of the synthetic panels, every one with its own pool of hotels
+DESTINATIONS = ('Paris', 'Berlin', 'New York', 'Rome', 'Madrid', 'Vienna', 'Prague', 'Lisbon')
+
+
+# Function to build the hotels of a search: popular hotels of the destination with the prices and link parameters of
+# this search, the way the same hotel comes back for every user and date range
+def make_search(pool: list[dict[str, Any]], rng: random.Random, hotels: int, search_id: int) -> list[dict[str, Any]]:
+    return [
+        {
+            **hotel,
+            'Price': hotel['Price'] + rng.randint(-30, 30),
+            'Link': hotel['Link'].replace('srpvid=0', f'srpvid={search_id:x}&checkin=2030-06-01&checkout=2030-06-03')
+        } for hotel in rng.sample(pool, hotels)
+    ]
+
+
+# Function to insert the synthetic panels and return the insert throughput and the database size
+async def measure(path: Path, users: int, panels_per_user: int, hotels: int, pool_size: int) -> dict[str, float]:
+    rng = random.Random(0)
+    pools = {destination: generate_hotels(destination, pool_size) for destination in DESTINATIONS}
+    now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+    searches = [
+        (destination := rng.choice(DESTINATIONS), make_search(pools[destination], rng, hotels, number))
+        for number in range(users * panels_per_user)
+    ]
+
+    db = DataBase(str(path))
+    await db.create_db()
+    start = time.perf_counter()
+    for number, (destination, hotels_info) in enumerate(searches):
+        await db.insert_user_data(
+            number // panels_per_user, number, len(hotels_info), now, hotels_info,
+            destination, '2030-06-01', '2030-06-03', 2, 0, 1, 'popularity', []
+        )
+    elapsed = time.perf_counter() - start
+    # Closing the last connection checkpoints the write-ahead log into the database file
+    await db.close()
+    return {'panels_per_second': len(searches) / elapsed, 'size_bytes': path.stat().st_size}
+
+
+async def main(users: int, panels_per_user: int, hotels: int, pool_size: int, output: Optional[Path],
+               compare: Optional[Path]) -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = await measure(Path(work_dir) / 'bot.db', users, panels_per_user, hotels, pool_size)
+
+    print(
+        f'{users * panels_per_user} panels of {hotels} hotels: {results["size_bytes"] / 2 ** 20:.1f} MiB, '
+        f'{results["panels_per_second"]:.0f} panels/s'
+    )
+    if compare:
+        baseline = json.loads(compare.read_text(encoding='utf-8'))
+        print(
+            f'compared with {baseline.get("commit")}: '
+            f'size {results["size_bytes"] / baseline["results"]["size_bytes"] - 1:+.1%}, '
+            f'throughput {results["panels_per_second"] / baseline["results"]["panels_per_second"] - 1:+.1%}'
+        )
+    if output:
+        report = {'commit': get_commit(), 'panels': users * panels_per_user, 'hotels': hotels, 'results': results}
+        output.write_text(json.dumps(report, indent=1), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the database size and insert throughput of many panels')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--panels', type=int, default=6, help='Info panels of every user')
+    parser.add_argument('--hotels', type=int, default=75, help='Hotels in every info panel')
+    parser.add_argument('--pool', type=int, default=400, help='Different hotels of every destination')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--compare', type=Path, help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.panels, args.hotels, args.pool, args.output, args.compare))
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import datetime
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.db_benchmark import FORM_VALUES
+from benchmarks.fixtures import generate_hotels
+from benchmarks.parser_benchmark import get_commit
+from database.db_class import DataBase
+
+
+# Function to count the rows of the price history
+async def count_price_history(db: DataBase) -> int:
+    async with db.reading() as conn:
+        async with conn.execute('SELECT COUNT(*) FROM price_history') as cur:
+            count = await cur.fetchone()
+    return count[0]
+
+
+# Function to insert, refresh and delete info panels and return how many panels per second every stage handled
+async def measure(db: DataBase, panels: int, users: int, hotels: int) -> dict[str, float]:
+    hotels_info = generate_hotels('Paris', hotels)
+    refreshed_hotels_info = generate_hotels('Paris', hotels, seed=1)
+    now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+    results = {}
+
+    # Create the panels the way new forms do
+    start = time.perf_counter()
+    info_panel_ids = [
+        await db.insert_user_data(
+            number % users, number, len(hotels_info), now, hotels_info, *FORM_VALUES
+        ) for number in range(panels)
+    ]
+    results['insert_panels_per_second'] = panels / (time.perf_counter() - start)
+
+    # Refresh every panel with new hotels the way Refresh and /refresh_all do
+    start = time.perf_counter()
+    for info_panel_id in info_panel_ids:
+        await db.update_hotels_info_panel(info_panel_id, refreshed_hotels_info, len(refreshed_hotels_info), now)
+    results['refresh_panels_per_second'] = panels / (time.perf_counter() - start)
+
+    # Refresh again with the same prices, which should add nothing to the price history
+    history_rows = await count_price_history(db)
+    start = time.perf_counter()
+    for info_panel_id in info_panel_ids:
+        await db.update_hotels_info_panel(info_panel_id, refreshed_hotels_info, len(refreshed_hotels_info), now)
+    results['refresh_unchanged_panels_per_second'] = panels / (time.perf_counter() - start)
+    results['history_rows_per_unchanged_refresh'] = (await count_price_history(db) - history_rows) / panels
+
+    # Delete the panels of every user at once, the way deleting all info panels does
+    start = time.perf_counter()
+    for user_id in range(users):
+        info_panels = await db.get_all_info_panels(user_id) or []
+        await db.delete_info_panels([info_panel.get('info_panel_id') for info_panel in info_panels])
+    results['delete_panels_per_second'] = panels / (time.perf_counter() - start)
+    return results
+
+
+async def main(panels: int, users: int, hotels: int, output: Optional[Path], compare: Optional[Path]) -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DataBase(str(Path(work_dir) / 'bot.db'))
+        await db.create_db()
+        results = await measure(db, panels, users, hotels)
+        await db.close()
+
+    baseline = json.loads(compare.read_text(encoding='utf-8')) if compare else None
+    for name, value in results.items():
+        line = f'{name:<36} {value:8.0f}'
+        if baseline and name in baseline['results']:
+            line += f'   {value / baseline["results"][name] - 1:+7.1%} against {baseline.get("commit")}'
+        print(line)
+
+    if output:
+        report = {'commit': get_commit(), 'panels': panels, 'hotels': hotels, 'results': results}
+        output.write_text(json.dumps(report, indent=1), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure how fast info panels are created, refreshed and deleted')
+    parser.add_argument('--panels', type=int, default=3000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--hotels', type=int, default=75, help='Hotels in every info panel')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--compare', type=Path, help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+    asyncio.run(main(args.panels, args.users, args.hotels, args.output, args.compare))
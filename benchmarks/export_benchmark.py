@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import datetime
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from benchmarks.db_benchmark import FORM_VALUES
+from benchmarks.fixtures import generate_hotels
+from benchmarks.parser_benchmark import get_commit
+from database.db_class import DataBase
+from utils.export import EXPORT_FORMATS, export_hotels_info
+from utils.utils import executor_shutdown, run_in_process
+
+
+# Function to measure the longest time the event loop couldn't run a timer until the stop event is set
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.001) -> float:
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start - interval)
+    return max_lag
+
+
+# Function to export the hotels of a user in every format and measure time, size and event loop lag
+async def measure(db: DataBase, user_id: int, exports: int) -> dict[str, dict[str, Any]]:
+    # Start the worker processes, so the first export doesn't pay for spawning them
+    await run_in_process(export_hotels_info, db.path, user_id, 'price', 'csv')
+
+    results = {}
+    for file_format in EXPORT_FORMATS:
+        stop = asyncio.Event()
+        lag = asyncio.create_task(measure_loop_lag(stop))
+        timings = []
+        for _ in range(exports):
+            start = time.perf_counter()
+            document = await run_in_process(export_hotels_info, db.path, user_id, 'price', file_format)
+            timings.append(time.perf_counter() - start)
+        stop.set()
+        results[file_format] = {
+            'seconds_per_export': min(timings),
+            'bytes': len(document),
+            'max_loop_lag_seconds': await lag
+        }
+    return results
+
+
+async def main(panels: int, hotels: int, exports: int, output: Optional[Path], compare: Optional[Path]) -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DataBase(str(Path(work_dir) / 'bot.db'))
+        await db.create_db()
+        # Fill the info panels of a single user, the table holds the hotels of all of them
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        for message_id in range(panels):
+            hotels_info = generate_hotels('Paris', hotels, seed=message_id)
+            await db.insert_user_data(1, message_id, len(hotels_info), now, hotels_info, *FORM_VALUES)
+        results = await measure(db, 1, exports)
+        await db.close()
+    await executor_shutdown()
+
+    baseline = json.loads(compare.read_text(encoding='utf-8')) if compare else None
+    for file_format, result in results.items():
+        line = (
+            f'{file_format:<6} {result["seconds_per_export"] * 1000:7.1f} ms/export, {result["bytes"] / 1024:7.1f} KiB, '
+            f'max event loop lag {result["max_loop_lag_seconds"] * 1000:6.1f} ms'
+        )
+        if baseline and file_format in baseline['results']:
+            baseline_result = baseline['results'][file_format]
+            line += f'   {result["seconds_per_export"] / baseline_result["seconds_per_export"] - 1:+7.1%} time'
+        print(line)
+    if baseline:
+        print(f'compared with {baseline.get("commit")}')
+
+    if output:
+        report = {'commit': get_commit(), 'panels': panels, 'hotels': hotels, 'results': results}
+        output.write_text(json.dumps(report, indent=1), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the Excel and CSV export of all hotels of a user')
+    parser.add_argument('--panels', type=int, default=6, help='Info panels of the user')
+    parser.add_argument('--hotels', type=int, default=150, help='Hotels in every info panel')
+    parser.add_argument('--exports', type=int, default=10, help='Exports of every format')
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--compare', type=Path, help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+    asyncio.run(main(args.panels, args.hotels, args.exports, args.output, args.compare))
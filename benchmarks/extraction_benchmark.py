@@ -0,0 +1,74 @@
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import PAGES_DIR, generate_hotels, render_property_card, render_search_page
+from parsers.extractors import EXTRACTORS
+
+
+# Function to load the saved pages together with generated pages of the given sizes
+def load_pages(pages_dir: Path, sizes: tuple[int, ...]) -> dict[str, str]:
+    pages = {path.name: path.read_text(encoding='utf-8') for path in sorted(pages_dir.glob('*.html'))}
+    for size in sizes:
+        hotels = generate_hotels('Benchmark', size, seed=size)
+        pages[f'generated-{size}'] = render_search_page('Benchmark', [render_property_card(hotel) for hotel in hotels])
+    return pages
+
+
+# Function to check that every backend returns the same records as the bs4 reference
+def check_parity(pages: dict[str, str]) -> bool:
+    parity = True
+    for page_name, page_source in pages.items():
+        reference = EXTRACTORS['bs4'](page_source)
+        for backend, extract in EXTRACTORS.items():
+            if extract(page_source) != reference:
+                print(f'parity mismatch: {backend} on {page_name}')
+                parity = False
+    return parity
+
+
+# Function to time one backend, run in a separate process so peak memory is not shared between backends
+def measure_backend(backend: str, pages: dict[str, str], rounds: int, results: multiprocessing.Queue) -> None:
+    extract = EXTRACTORS[backend]
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit
+
+    cards = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page_source in pages.values():
+            cards += len(extract(page_source))
+    elapsed = time.perf_counter() - start
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit
+    results.put((backend, cards / elapsed, elapsed / (rounds * len(pages)), peak_rss - baseline_rss))
+
+
+def main(rounds: int, sizes: tuple[int, ...]) -> None:
+    pages = load_pages(PAGES_DIR, sizes)
+    if not check_parity(pages):
+        sys.exit(1)
+    print(f'parity: all backends match bs4 on {len(pages)} pages')
+
+    results = multiprocessing.Queue()
+    for backend in EXTRACTORS:
+        process = multiprocessing.Process(target=measure_backend, args=(backend, pages, rounds, results))
+        process.start()
+        process.join()
+        backend, cards_per_second, seconds_per_page, peak_memory = results.get()
+        print(
+            f'{backend:>5}: {cards_per_second:10.0f} cards/s, {seconds_per_page * 1000:8.2f} ms/page, '
+            f'peak memory +{peak_memory / 2 ** 20:.1f} MiB'
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the speed and memory of hotel extraction backends')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[25, 50, 75, 500])
+    args = parser.parse_args()
+    main(args.rounds, tuple(args.sizes))
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import random
+from pathlib import Path
+
+from aiohttp import web
+
+from benchmarks.fixtures import PAGES_DIR, generate_hotels, render_property_card, render_search_page
+
+
+# Page returned instead of search results when the server pretends to block the bot
+BLOCK_PAGE = (
+    '<!DOCTYPE html><html><head><title>Booking.com</title>'
+    '<script src="https://token.awswaf.com/challenge.js"></script></head>'
+    '<body><div id="captcha-container"></div></body></html>'
+)
+
+
+# Function to create the web application serving saved search pages
+def create_app(
+    pages_dir: Path = PAGES_DIR, latency: float = 0.0, jitter: float = 0.0, block_rate: float = 0.0,
+    total_results: int = 75
+) -> web.Application:
+    # Load every saved page into memory, keyed by the destination slug
+    pages = {path.stem: path.read_text(encoding='utf-8') for path in sorted(pages_dir.glob('*.html'))}
+    default_page = next(iter(pages.values()))
+    rng = random.Random(0)
+
+    async def search_results(request: web.Request) -> web.Response:
+        # Simulate the time Booking.com needs to answer
+        await asyncio.sleep(latency + rng.uniform(0, jitter))
+        if rng.random() < block_rate:
+            return web.Response(text=BLOCK_PAGE, content_type='text/html')
+
+        destination = request.query.get('ss', '')
+        slug = destination.lower().replace(' ', '-')
+        offset = int(request.query.get('offset', 0))
+        if not offset:
+            return web.Response(text=pages.get(slug, default_page), content_type='text/html')
+
+        # Generate deeper result pages, the last ones are short or empty like at the end of real results
+        hotels = generate_hotels(destination, max(min(25, total_results - offset), 0), seed=offset, start=offset + 1)
+        page = render_search_page(destination, [render_property_card(hotel) for hotel in hotels])
+        return web.Response(text=page, content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/searchresults.html', search_results)
+    return app
+
+
+# Function to start the server in the running event loop and return its search URL
+async def start_server(
+    host: str = '127.0.0.1', port: int = 0, **app_options
+) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(create_app(**app_options), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    # Port 0 lets the system pick a free port, so read the real one back from the socket
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://{host}:{bound_port}/searchresults.html'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve saved Booking.com search pages')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--pages', type=Path, default=PAGES_DIR)
+    parser.add_argument('--latency', type=float, default=0.0, help='Base response time in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra response time in seconds')
+    parser.add_argument('--block-rate', type=float, default=0.0, help='Share of requests answered with a block page')
+    parser.add_argument('--total-results', type=int, default=75, help='Number of results available through offsets')
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(args.pages, args.latency, args.jitter, args.block_rate, args.total_results),
+        host=args.host, port=args.port
+    )
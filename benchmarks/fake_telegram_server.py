@@ -0,0 +1,140 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+from aiohttp import web
+
+
+# User the fake server answers getMe with
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'Booking Bot', 'username': 'booking_load_test_bot'}
+
+# Methods answered with True instead of a message
+BOOLEAN_METHODS = {
+    'deleteMessage', 'answerCallbackQuery', 'deleteWebhook', 'setMyCommands', 'deleteMyCommands', 'setWebhook'
+}
+
+
+class Call:
+    # Initialize a record of a single Bot API call made by the bot
+    def __init__(self, method: str, params: dict[str, Any], result: Any) -> None:
+        self.time = time.perf_counter()
+        self.method = method
+        self.params = params
+        self.result = result
+
+
+class FakeTelegram:
+    # Initialize the fake Bot API with an optional delay before every answer
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.updates: list[dict[str, Any]] = []
+        # Calls made by the bot, grouped by chat id
+        self.calls: dict[int, list[Call]] = defaultdict(list)
+        self.changed = asyncio.Event()
+        self.polling = asyncio.Event()
+
+    # Queue an update for the bot and wake the pending getUpdates request
+    def push_update(self, kind: str, payload: dict[str, Any]) -> None:
+        self.updates.append({'update_id': next(self.update_ids), kind: payload})
+        self.wake()
+
+    # Wake everyone waiting for updates or calls
+    def wake(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    # Wait until the calls made to a chat after the given index satisfy the check, and return what the check found
+    async def wait_for(
+        self, chat_id: int, start: int, check: Callable[[list[Call]], Any], timeout: float
+    ) -> Optional[Any]:
+        deadline = time.perf_counter() + timeout
+        while True:
+            changed = self.changed
+            found = check(self.calls[chat_id][start:])
+            if found:
+                return found
+            try:
+                await asyncio.wait_for(changed.wait(), deadline - time.perf_counter())
+            except (asyncio.TimeoutError, ValueError):
+                return None
+
+    # Build a message sent by the bot, in the shape the Bot API returns it
+    def create_message(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
+        message = {
+            'message_id': int(params.get('message_id') or next(self.message_ids)),
+            'date': int(time.time()),
+            'chat': {'id': int(params['chat_id']), 'type': 'private'},
+            'from': BOT_USER
+        }
+        if 'text' in params:
+            message['text'] = params['text']
+        if 'caption' in params:
+            message['caption'] = params['caption']
+        if method in ('sendPhoto', 'editMessageMedia'):
+            message['photo'] = [
+                {'file_id': f'photo-{message["message_id"]}', 'file_unique_id': 'photo', 'width': 500, 'height': 500}
+            ]
+        if method == 'sendDocument':
+            message['document'] = {'file_id': f'document-{message["message_id"]}', 'file_unique_id': 'document'}
+        if 'reply_markup' in params:
+            message['reply_markup'] = json.loads(params['reply_markup'])
+        return message
+
+    # Answer a Bot API method, recording every call to a chat
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = dict(await request.post())
+
+        if method == 'getUpdates':
+            return web.json_response({'ok': True, 'result': await self.get_updates(params)})
+
+        await asyncio.sleep(self.latency)
+        if method == 'getMe':
+            result = BOT_USER
+        elif method in BOOLEAN_METHODS:
+            result = True
+        else:
+            result = self.create_message(method, params)
+
+        if 'chat_id' in params:
+            self.calls[int(params['chat_id'])].append(Call(method, params, result))
+        elif method == 'answerCallbackQuery':
+            # Callback answers carry no chat id, the load test uses the user id as the callback query id
+            self.calls[int(params['callback_query_id'].split('-')[0])].append(Call(method, params, result))
+        self.wake()
+        return web.json_response({'ok': True, 'result': result})
+
+    # Return the updates the bot has not confirmed yet, waiting up to a second for new ones
+    async def get_updates(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        self.polling.set()
+        offset = int(params.get('offset', 0))
+        self.updates = [update for update in self.updates if update['update_id'] >= offset]
+        if not self.updates:
+            changed = self.changed
+            try:
+                await asyncio.wait_for(changed.wait(), min(float(params.get('timeout', 0)), 1.0))
+            except asyncio.TimeoutError:
+                pass
+        return self.updates
+
+    # Create the web application serving the Bot API methods
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        return app
+
+
+# Function to start the fake Bot API in the running event loop and return its base URL
+async def start_server(telegram: FakeTelegram, host: str = '127.0.0.1', port: int = 0) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(telegram.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    # Port 0 lets the system pick a free port, so read the real one back from the socket
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://{host}:{bound_port}'
@@ -0,0 +1,139 @@
+import json
+import random
+from html import escape
+from pathlib import Path
+from typing import Any, Optional
+
+
+# Directory with the saved search pages served by the fake Booking.com server
+PAGES_DIR = Path(__file__).parent / 'pages'
+
+# Directory with the parser fixture corpus: saved search pages with the hotels expected from each of them
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+
+# Pages of the corpus: file name, destination, number of cards, share of cards without rating and with a discount
+CORPUS_PAGES = (
+    ('paris-25', 'Paris', 25, 0.1, 0.0),
+    ('new-york-50', 'New York', 50, 0.1, 0.3),
+    ('sao-paulo-75', 'São Paulo', 75, 0.4, 0.5),
+    ('zurich-25-no-ratings', 'Zürich', 25, 1.0, 0.0),
+    ('cap-d-antibes-50-discounts', "Cap d'Antibes & Juan-les-Pins", 50, 0.0, 1.0),
+    ('tokyo-75', 'Tokyo', 75, 0.05, 0.1)
+)
+
+# Words used to build anonymized hotel names
+NAME_PARTS = (
+    'Grand', 'Royal', 'City', 'Garden', 'Park', 'River', 'Old Town', 'Central',
+    'Harbour', 'Palace', 'Boutique', 'Plaza', 'Station', 'Loft', 'Residence'
+)
+NAME_KINDS = ('Hotel', 'Apartments', 'Suites', 'Hostel', 'Inn', 'Guesthouse')
+
+
+# Function to generate anonymized hotel records for a destination
+def generate_hotels(
+    destination: str, count: int, seed: int = 0, missing_rating_share: float = 0.1, start: int = 1
+) -> list[dict[str, Any]]:
+    rng = random.Random(f'{destination}-{seed}')
+    hotels = []
+    for number in range(start, start + count):
+        hotel_id = rng.randint(100000, 9999999)
+        slug = f'{destination.lower().replace(" ", "-")}-{number}'
+        hotels.append({
+            'Name': f'{rng.choice(NAME_PARTS)} {rng.choice(NAME_KINDS)} {destination} {number}',
+            'Price': rng.randint(40, 2500),
+            'Rating': None if rng.random() < missing_rating_share else round(rng.uniform(5, 10), 1),
+            'Photo': f'https://cf.bstatic.com/xdata/images/hotel/square600/{hotel_id}.jpg?k={hotel_id:x}&o=',
+            'Link': f'https://www.booking.com/hotel/xx/{slug}.html?aid=304142&label=gen&ucfs=1&srpvid={seed}'
+        })
+    return hotels
+
+
+# Function to render a single property card in the same layout as Booking.com search results
+def render_property_card(hotel: dict[str, Any], original_price: Optional[int] = None) -> str:
+    link = escape(hotel['Link'])
+    rating = hotel['Rating']
+    # Booking.com shows the old price next to the discounted one
+    discount = (
+        f'<span class="c73ff05531 e84eb96b1f" aria-hidden="true">US${original_price:,}</span>'
+        if original_price else ''
+    )
+    review_score = (
+        '<div data-testid="review-score" class="a3332d346a">'
+        f'<div class="a3b8729ab1 d86cee9b25" aria-hidden="true">Scored {rating} </div>'
+        '<div class="a3b8729ab1 e6208ee469 cb2cbb3ccb">'
+        '<div class="a3b8729ab1 e6208ee469 cb2cbb3ccb">Very good</div>'
+        '<div class="abf093bdfe f45d8e4c32 d935416c47">1,024 reviews</div>'
+        '</div></div>'
+        if rating is not None else ''
+    )
+    return (
+        '<div data-testid="property-card" role="listitem" class="c066246e13">'
+        '<div class="c066246e13 d8aec464ca">'
+        f'<a href="{link}" tabindex="-1" aria-hidden="true">'
+        f'<img src="{escape(hotel["Photo"])}" alt="{escape(hotel["Name"])}" width="200" height="200" '
+        'class="f9671d49b1" loading="lazy"></a></div>'
+        '<div class="c1edfbabcb"><div class="c624d7469d">'
+        f'<h3 class="aab71f8e4e"><a data-testid="title-link" href="{link}" class="a78ca197d0">'
+        f'<div data-testid="title" class="f6431b446c a15b38c233">{escape(hotel["Name"])}</div>'
+        '</a></h3>'
+        '<div data-testid="availability-rate-information" class="c5ca594cb1">'
+        f'{discount}'
+        '<span class="f6431b446c fbfd7c1165 e84eb96b1f" data-testid="price-and-discounted-price" '
+        f'aria-hidden="true">US${hotel["Price"]:,}</span>'
+        '<div data-testid="taxes-and-charges" class="abf093bdfe f45d8e4c32">+US$24 taxes and charges</div>'
+        '</div>'
+        f'{review_score}'
+        '</div></div></div>'
+    )
+
+
+# Function to render a search results page with the given property cards
+def render_search_page(destination: str, cards: list[str]) -> str:
+    return (
+        '<!DOCTYPE html><html lang="en-us"><head><meta charset="utf-8">'
+        f'<title>{escape(destination)} hotels - Booking.com</title>'
+        '<script>window.booking = window.booking || {};</script>'
+        '</head><body>'
+        '<div id="b2searchresultsPage"><div data-capla-component="b-search-web-searchresults">'
+        f'<h1 aria-live="assertive">{escape(destination)}: {len(cards)} properties found</h1>'
+        f'<div role="list">{"".join(cards)}</div>'
+        '<button type="button"><span>Load more results</span></button>'
+        '</div></div></body></html>'
+    )
+
+
+# Function to save a generated search page for the fake Booking.com server
+def save_search_page(destination: str, count: int, seed: int = 0) -> Path:
+    hotels = generate_hotels(destination, count, seed)
+    page = render_search_page(destination, [render_property_card(hotel) for hotel in hotels])
+    PAGES_DIR.mkdir(exist_ok=True)
+    path = PAGES_DIR / f'{destination.lower().replace(" ", "-")}.html'
+    path.write_text(page, encoding='utf-8')
+    return path
+
+
+# Function to save a corpus page and the hotels the parser is expected to extract from it
+def save_corpus_page(
+    name: str, destination: str, count: int, missing_rating_share: float, discount_share: float
+) -> Path:
+    hotels = generate_hotels(destination, count, seed=count, missing_rating_share=missing_rating_share)
+    rng = random.Random(name)
+    # Discounted cards show the old price next to the price the hotel is expected to have
+    cards = [
+        render_property_card(hotel, hotel['Price'] + rng.randint(10, 500) if rng.random() < discount_share else None)
+        for hotel in hotels
+    ]
+    CORPUS_DIR.mkdir(exist_ok=True)
+    path = CORPUS_DIR / f'{name}.html'
+    path.write_text(render_search_page(destination, cards), encoding='utf-8')
+    (CORPUS_DIR / f'{name}.json').write_text(json.dumps(hotels, ensure_ascii=False, indent=1), encoding='utf-8')
+    return path
+
+
+if __name__ == '__main__':
+    # Generate the saved pages used by the fake Booking.com server
+    for page_destination in ('Paris', 'Berlin', 'New York'):
+        print(save_search_page(page_destination, 25))
+    # Generate the parser fixture corpus
+    for corpus_page in CORPUS_PAGES:
+        print(save_corpus_page(*corpus_page))
@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.fake_booking_server import start_server
+from parsers.http_fetcher import fetch_booking, http_session_shutdown
+from utils.utils import executor_shutdown
+
+
+# Function to time a single HTTP fast path search
+async def timed_search(base_url: str, destination: str) -> tuple[float, bool]:
+    start = time.perf_counter()
+    hotels = await fetch_booking(destination, '2030-05-01', '2030-05-03', 2, 1, 0, [], 'popularity', base_url)
+    return time.perf_counter() - start, hotels is not None
+
+
+async def main(searches: int, latency: float, block_rate: float) -> None:
+    runner, base_url = await start_server(latency=latency, block_rate=block_rate)
+    try:
+        destinations = ('Paris', 'Berlin', 'New York')
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            timed_search(base_url, destinations[number % len(destinations)]) for number in range(searches)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        await http_session_shutdown()
+        await executor_shutdown()
+        await runner.cleanup()
+
+    latencies = sorted(latency for latency, _ in results)
+    served = sum(served for _, served in results)
+    print(f'searches: {searches}, served by HTTP: {served}, need browser: {searches - served}')
+    print(f'total: {elapsed:.3f}s, throughput: {searches / elapsed:.1f} searches/s')
+    print(
+        f'latency p50: {statistics.median(latencies) * 1000:.1f}ms, '
+        f'p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms, '
+        f'max: {latencies[-1] * 1000:.1f}ms'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the HTTP fast path against the fake Booking.com server')
+    parser.add_argument('--searches', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--block-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.searches, args.latency, args.block_rate))
@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from benchmarks import fake_booking_server
+from benchmarks.fake_telegram_server import Call, FakeTelegram, start_server
+from utils import constants
+from utils.metrics import metrics
+
+
+# Destinations the simulated users search, several users share some of them
+DESTINATIONS = ('Paris', 'Berlin', 'New York', 'Rome', 'Madrid', 'Vienna', 'Prague', 'Lisbon')
+
+# How long a single step may take before it counts as failed
+STEP_TIMEOUT = 120
+
+
+# Function to point the bot at the fake servers, it has to run before the bot modules are imported because they read
+# the configuration and constants at import time
+def configure_bot(booking_url: str, telegram_url: str, work_dir: Path) -> None:
+    os.environ.update(
+        BOT_TOKEN='123456:load-test',
+        DATABASE=str(work_dir / 'bot.db'),
+        TELEGRAM_API_SERVER=telegram_url
+    )
+    constants.BOOKING_SEARCH_URL = booking_url
+    constants.CACHE_DB_PATH = str(work_dir / 'search_cache.db')
+    # Let Refresh and /refresh_all scrape again right after the panels were created
+    constants.MIN_REFRESH_TIME = 0
+
+
+# Function to find the first message the bot sent, optionally only messages with an inline keyboard
+def sent_message(with_keyboard: bool = False) -> Callable[[list[Call]], Optional[dict]]:
+    def check(calls: list[Call]) -> Optional[dict]:
+        for call in calls:
+            if call.method == 'sendMessage' and (not with_keyboard or 'reply_markup' in call.params):
+                return call.result
+        return None
+    return check
+
+
+# Function to find the info panels sent after the form, once the 'Collecting data...' message has been deleted
+def created_panels(calls: list[Call]) -> Optional[list[Call]]:
+    collecting = next((
+        call.result['message_id'] for call in calls
+        if call.method == 'sendMessage' and 'Collecting data' in call.params.get('text', '')
+    ), None)
+    if collecting is None:
+        return None
+    if not any(call.method == 'deleteMessage' and int(call.params['message_id']) == collecting for call in calls):
+        return None
+    # Return every answer of the form, the panels are photos and missing results are text messages
+    return [call for call in calls if call.method in ('sendPhoto', 'sendMessage')] or None
+
+
+# Function to find the new photos of the info panels, or the answer shown when they could not be updated
+def updated_panels(count: int = 1) -> Callable[[list[Call]], Optional[list[Call]]]:
+    def check(calls: list[Call]) -> Optional[list[Call]]:
+        updates = [call for call in calls if call.method == 'editMessageMedia']
+        if len(updates) >= count:
+            return updates
+        # Refresh answers the callback when no information is available, /refresh_all sends a message
+        if any(call.method in ('answerCallbackQuery', 'sendMessage') for call in calls):
+            return calls
+        return None
+    return check
+
+
+# Function to get a percentile of sorted values with the nearest-rank method
+def percentile(ordered: list[float], share: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, round(len(ordered) * share) - 1))]
+
+
+class SimulatedUser:
+    # Initialize a user with its own chat and the destinations it searches
+    def __init__(self, telegram: FakeTelegram, user_id: int, destinations: list[str], report: 'Report') -> None:
+        self.telegram = telegram
+        self.user_id = user_id
+        self.destinations = destinations
+        self.report = report
+        self.callback_ids = itertools.count(1)
+
+    # Send a text message from the user to the bot
+    def send_message(self, text: str) -> None:
+        self.telegram.push_update('message', {
+            'message_id': 0,
+            'date': int(time.time()),
+            'chat': {'id': self.user_id, 'type': 'private'},
+            'from': {'id': self.user_id, 'is_bot': False, 'first_name': f'User {self.user_id}'},
+            'text': text
+        })
+
+    # Press an inline keyboard button of a message sent by the bot
+    def press_button(self, message: dict[str, Any], data: str) -> None:
+        self.telegram.push_update('callback_query', {
+            'id': f'{self.user_id}-{next(self.callback_ids)}',
+            'from': {'id': self.user_id, 'is_bot': False, 'first_name': f'User {self.user_id}'},
+            'chat_instance': str(self.user_id),
+            'message': message,
+            'data': data
+        })
+
+    # Run one step: act, then wait for the bot's answer and record how long it took
+    async def step(self, name: str, act: Callable[[], None], check: Callable[[list[Call]], Any]) -> Any:
+        start_index = len(self.telegram.calls[self.user_id])
+        start = time.perf_counter()
+        act()
+        found = await self.telegram.wait_for(self.user_id, start_index, check, STEP_TIMEOUT)
+        if not found:
+            self.report.failures[name] += 1
+            raise TimeoutError(f'user {self.user_id} got no answer to {name}')
+        self.report.latencies[name].append(time.perf_counter() - start)
+        return found
+
+    # Fill in the form, browse the panels, refresh one of them and then all of them
+    async def run(self) -> None:
+        check_in = datetime.date.today() + datetime.timedelta(days=30)
+        check_out = check_in + datetime.timedelta(days=2)
+
+        await self.step('start_form', lambda: self.send_message('/start_form'), sent_message())
+        calendar = await self.step(
+            'destination', lambda: self.send_message(', '.join(self.destinations)), sent_message(True)
+        )
+        calendar = await self.step(
+            'check_in', lambda: self.press_button(calendar, f'simple_calendar:DAY:{check_in:%Y:%m:%d}'),
+            sent_message(True)
+        )
+        dates_prompt = await self.step(
+            'check_out', lambda: self.press_button(calendar, f'simple_calendar:DAY:{check_out:%Y:%m:%d}'),
+            sent_message(True)
+        )
+        adults_prompt = await self.step(
+            'dates', lambda: self.press_button(dates_prompt, 'dont_add_dates'), sent_message(True)
+        )
+        children_prompt = await self.step('adults', lambda: self.press_button(adults_prompt, 'ok'), sent_message(True))
+        # The form starts with one child, so the age of that child is asked next
+        age_prompt = await self.step('children', lambda: self.press_button(children_prompt, 'ok'), sent_message(True))
+        rooms_prompt = await self.step('children_age', lambda: self.press_button(age_prompt, '8'), sent_message(True))
+        sorting_prompt = await self.step('rooms', lambda: self.press_button(rooms_prompt, 'ok'), sent_message(True))
+
+        form_sent = time.perf_counter()
+        answers = await self.step('order_by', lambda: self.press_button(sorting_prompt, 'popularity'), created_panels)
+        panels = [call for call in answers if call.method == 'sendPhoto']
+        if not panels:
+            return
+        self.report.latencies['first_panel'].append(panels[0].time - form_sent)
+
+        panel = panels[0].result
+        await self.step('navigate', lambda: self.press_button(panel, 'info_next'), updated_panels())
+        await self.step('refresh', lambda: self.press_button(panel, 'refresh'), updated_panels())
+        await self.step('refresh_all', lambda: self.send_message('/refresh_all'), updated_panels(len(panels)))
+
+
+# Function to read the peak memory of a process from /proc, the children's ru_maxrss also counts the memory of the bot
+# that a spawned worker had for a moment between fork and exec
+def get_peak_rss(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/status', encoding='utf-8') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class Report:
+    # Initialize empty step latencies and failure counters
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = {}
+        self.failures: dict[str, int] = {}
+        self.max_queue_depth = 0.0
+        self.max_running = 0.0
+        self.max_worker_rss = 0
+
+    # Register the steps in the order they are reported
+    def add_steps(self, *names: str) -> None:
+        for name in names:
+            self.latencies.setdefault(name, [])
+            self.failures.setdefault(name, 0)
+
+    # Sample the scrape scheduler gauges and the peak memory of the worker processes until the task is cancelled
+    async def sample_executor(self, interval: float = 0.05) -> None:
+        # Imported here, the bot modules are imported only after they have been pointed at the fake servers
+        from utils.utils import process_executor
+        while True:
+            gauges = metrics.snapshot()['gauges']
+            queue_depth = sum(value for name, value in gauges.items() if name.startswith('scheduler.queue_depth.'))
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            self.max_running = max(self.max_running, gauges.get('scheduler.running', 0))
+            for pid in list(process_executor._processes or {}):
+                self.max_worker_rss = max(self.max_worker_rss, get_peak_rss(pid))
+            await asyncio.sleep(interval)
+
+    # Summarize the run as a dictionary that can be saved as JSON
+    def summarize(self, users: int, completed: int, elapsed: float) -> dict[str, Any]:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        rss_unit = 1 if sys.platform == 'darwin' else 1024
+        steps = {}
+        for name, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            steps[name] = {
+                'count': len(ordered),
+                'failures': self.failures[name],
+                'p50': percentile(ordered, 0.5),
+                'p90': percentile(ordered, 0.9),
+                'p99': percentile(ordered, 0.99),
+                'max': percentile(ordered, 1.0)
+            }
+        return {
+            'users': users,
+            'completed': completed,
+            'elapsed': elapsed,
+            'scenarios_per_second': completed / elapsed,
+            'steps_per_second': sum(len(latencies) for latencies in self.latencies.values()) / elapsed,
+            'steps': steps,
+            'max_scheduler_queue_depth': self.max_queue_depth,
+            'max_scheduler_running': self.max_running,
+            'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit,
+            'peak_worker_rss_bytes': self.max_worker_rss,
+            'metrics': metrics.snapshot()
+        }
+
+
+# Function to print the summary as a table
+def print_summary(summary: dict[str, Any]) -> None:
+    print(
+        f'{summary["completed"]}/{summary["users"]} users completed in {summary["elapsed"]:.1f}s, '
+        f'{summary["scenarios_per_second"]:.2f} scenarios/s, {summary["steps_per_second"]:.1f} steps/s'
+    )
+    print(f'{"step":<12} {"count":>6} {"fail":>5} {"p50":>8} {"p90":>8} {"p99":>8} {"max":>8}')
+    for name, step in summary['steps'].items():
+        values = ' '.join(
+            f'{step[key] * 1000:7.0f}ms' if step[key] is not None else f'{"-":>9}'
+            for key in ('p50', 'p90', 'p99', 'max')
+        )
+        print(f'{name:<12} {step["count"]:>6} {step["failures"]:>5} {values}')
+    print(
+        f'scrape scheduler: max queue depth {summary["max_scheduler_queue_depth"]:.0f}, '
+        f'max running {summary["max_scheduler_running"]:.0f}'
+    )
+    print(
+        f'peak RSS: bot {summary["peak_rss_bytes"] / 2 ** 20:.0f} MiB, '
+        f'largest worker process {summary["peak_worker_rss_bytes"] / 2 ** 20:.0f} MiB'
+    )
+
+
+async def main(
+    users: int, destinations_per_user: int, booking_latency: float, booking_jitter: float,
+    telegram_latency: float, output: Optional[Path]
+) -> None:
+    telegram = FakeTelegram(telegram_latency)
+    telegram_runner, telegram_url = await start_server(telegram)
+    booking_runner, booking_url = await fake_booking_server.start_server(
+        latency=booking_latency, jitter=booking_jitter
+    )
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        configure_bot(booking_url, telegram_url, Path(work_dir))
+        # Import the real bot only now, so it picks up the fake servers
+        import app as bot_app
+        from parsers.result_cache import search_cache
+        search_cache.path = constants.CACHE_DB_PATH
+
+        polling = asyncio.create_task(bot_app.main())
+        await asyncio.wait_for(telegram.polling.wait(), 30)
+
+        report = Report()
+        report.add_steps(
+            'start_form', 'destination', 'check_in', 'check_out', 'dates', 'adults', 'children', 'children_age',
+            'rooms', 'order_by', 'first_panel', 'navigate', 'refresh', 'refresh_all'
+        )
+        sampler = asyncio.create_task(report.sample_executor())
+
+        rng = random.Random(0)
+        simulated_users = [
+            SimulatedUser(telegram, 1000 + number, rng.sample(DESTINATIONS, destinations_per_user), report)
+            for number in range(users)
+        ]
+        start = time.perf_counter()
+        results = await asyncio.gather(*(user.run() for user in simulated_users), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+
+        sampler.cancel()
+        await bot_app.dp.stop_polling()
+        await polling
+        await booking_runner.cleanup()
+        await telegram_runner.cleanup()
+
+    for result in results:
+        if isinstance(result, Exception):
+            print(f'failed: {result!r}')
+    summary = report.summarize(users, sum(result is None for result in results), elapsed)
+    print_summary(summary)
+    if output:
+        output.write_text(json.dumps(summary, indent=1), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the bot against fake Telegram and Booking.com servers')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--destinations', type=int, default=2, help='Destinations in every form')
+    parser.add_argument('--booking-latency', type=float, default=0.3)
+    parser.add_argument('--booking-jitter', type=float, default=0.2)
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--output', type=Path, help='Write the report as JSON to this file')
+    args = parser.parse_args()
+    asyncio.run(main(
+        args.users, args.destinations, args.booking_latency, args.booking_jitter, args.telegram_latency, args.output
+    ))
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_booking_server import start_server
+from utils import constants
+from utils.constants import RESULTS_PER_PAGE
+from utils.utils import executor_shutdown
+
+
+# Form values shared by every request of the benchmark
+FORM_VALUES = ('Paris', '2030-05-01', '2030-05-03', 2, 1, 0, [], 'popularity')
+
+
+# Function to scrape the result pages one after another, like clicking 'Load more results'
+async def fetch_sequential(pages: int) -> list[dict]:
+    from parsers.search import new_hotels, scrape_page
+
+    seen = set()
+    hotels = []
+    for page in range(pages):
+        hotels.extend(new_hotels(await scrape_page(FORM_VALUES, page * RESULTS_PER_PAGE, 0, 0), seen))
+    return hotels
+
+
+# Function to scrape all result pages at once by offset, the way the bot does
+async def fetch_concurrent(pages: int) -> list[dict]:
+    from parsers import search
+
+    search.RESULT_PAGES = pages
+    hotels = []
+    async for stage in search.scrape_hotels(*FORM_VALUES):
+        hotels.extend(stage)
+    return hotels
+
+
+async def main(max_pages: int, latency: float) -> None:
+    runner, base_url = await start_server(latency=latency, total_results=max_pages * RESULTS_PER_PAGE)
+    # Point the parser at the fake server before it is imported, the fetcher reads the URL at import time
+    constants.BOOKING_SEARCH_URL = base_url
+    from parsers.http_fetcher import http_session_shutdown
+
+    try:
+        # Start the session and the parser processes before timing, the bot pays this cost only once
+        await fetch_concurrent(1)
+        print(f'{latency}s page latency, {RESULTS_PER_PAGE} results per page')
+        for pages in range(1, max_pages + 1):
+            timings = []
+            for fetch in (fetch_sequential, fetch_concurrent):
+                start = time.perf_counter()
+                hotels = await fetch(pages)
+                timings.append(time.perf_counter() - start)
+            print(
+                f'pages: {pages}, hotels: {len(hotels)}, '
+                f'sequential: {timings[0]:.3f}s, concurrent: {timings[1]:.3f}s'
+            )
+    finally:
+        await http_session_shutdown()
+        await executor_shutdown()
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare sequential and concurrent fetching of result pages')
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.latency))
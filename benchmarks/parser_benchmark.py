@@ -0,0 +1,154 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Optional
+
+from benchmarks.fixtures import CORPUS_DIR
+from parsers.extractors import EXTRACTORS
+
+
+# Fields every extracted hotel must have
+FIELDS = ('Name', 'Price', 'Rating', 'Photo', 'Link')
+
+
+# Function to load the corpus pages together with the hotels expected from them
+def load_corpus(corpus_dir: Path) -> dict[str, tuple[str, list[dict]]]:
+    return {
+        path.stem: (
+            path.read_text(encoding='utf-8'),
+            json.loads(path.with_suffix('.json').read_text(encoding='utf-8'))
+        ) for path in sorted(corpus_dir.glob('*.html'))
+    }
+
+
+# Function to count the wrong fields of the extracted hotels, a missing or extra hotel counts all of its fields
+def count_mismatches(hotels: list[dict], expected: list[dict]) -> dict[str, int]:
+    mismatches = {field: abs(len(hotels) - len(expected)) for field in FIELDS}
+    for hotel, expected_hotel in zip(hotels, expected):
+        for field in FIELDS:
+            if hotel.get(field) != expected_hotel.get(field):
+                mismatches[field] += 1
+    return {field: count for field, count in mismatches.items() if count}
+
+
+# Function to measure one backend over the corpus, run in a separate process so peak memory is not shared
+def measure_backend(
+    backend: str, corpus: dict[str, tuple[str, list[dict]]], rounds: int, results: multiprocessing.Queue
+) -> None:
+    extract = EXTRACTORS[backend]
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit
+
+    pages = {}
+    for name, (page_source, expected) in corpus.items():
+        # Check the fields and the peak of Python allocations on a single run
+        tracemalloc.start()
+        hotels = extract(page_source)
+        _, peak_python = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Time the page separately from the memory tracing, which slows extraction down
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            extract(page_source)
+            timings.append(time.perf_counter() - start)
+        seconds_per_page = statistics.median(timings)
+
+        pages[name] = {
+            'cards': len(expected),
+            'extracted': len(hotels),
+            'mismatches': count_mismatches(hotels, expected),
+            'seconds_per_page': seconds_per_page,
+            'seconds_per_card': seconds_per_page / max(len(expected), 1),
+            'peak_python_bytes': peak_python
+        }
+
+    cards = sum(page['cards'] for page in pages.values())
+    seconds = sum(page['seconds_per_page'] for page in pages.values())
+    results.put({
+        'backend': backend,
+        'correct': not any(page['mismatches'] for page in pages.values()),
+        'cards_per_second': cards / seconds,
+        'peak_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit - baseline_rss,
+        'pages': pages
+    })
+
+
+# Function to get the current commit, so results of different commits can be told apart
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Function to print how the median page time of every backend and page changed against an earlier run
+def print_comparison(report: dict[str, Any], baseline: dict[str, Any]) -> None:
+    print(f'compared with {baseline.get("commit")}:')
+    for backend, result in report['backends'].items():
+        baseline_pages = baseline['backends'].get(backend, {}).get('pages', {})
+        for name, page in result['pages'].items():
+            if name in baseline_pages:
+                change = page['seconds_per_page'] / baseline_pages[name]['seconds_per_page'] - 1
+                print(f'{backend:>5} {name:<28} {change:+7.1%}')
+
+
+def main(rounds: int, backends: list[str], output: Optional[Path], compare: Optional[Path]) -> None:
+    corpus = load_corpus(CORPUS_DIR)
+    report = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'rounds': rounds,
+        'backends': {}
+    }
+
+    results = multiprocessing.Queue()
+    for backend in backends:
+        process = multiprocessing.Process(target=measure_backend, args=(backend, corpus, rounds, results))
+        process.start()
+        result = results.get()
+        process.join()
+        report['backends'][backend] = result
+
+        print(
+            f'{backend}: {"correct" if result["correct"] else "WRONG FIELDS"}, '
+            f'{result["cards_per_second"]:.0f} cards/s, peak memory +{result["peak_rss_bytes"] / 2 ** 20:.1f} MiB'
+        )
+        for name, page in result['pages'].items():
+            print(
+                f'  {name:<28} {page["extracted"]:>3}/{page["cards"]:<3} cards, '
+                f'{page["seconds_per_page"] * 1000:7.2f} ms/page, {page["seconds_per_card"] * 1e6:6.1f} µs/card, '
+                f'{page["peak_python_bytes"] / 2 ** 10:7.1f} KiB Python peak'
+                f'{", wrong: " + json.dumps(page["mismatches"]) if page["mismatches"] else ""}'
+            )
+
+    if output:
+        output.write_text(json.dumps(report, indent=1), encoding='utf-8')
+    if compare:
+        print_comparison(report, json.loads(compare.read_text(encoding='utf-8')))
+
+    # Fail when any backend extracted wrong fields, so the benchmark can guard against regressions
+    if not all(result['correct'] for result in report['backends'].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time and check hotel extraction on the saved fixture corpus')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--backends', nargs='*', default=list(EXTRACTORS), choices=list(EXTRACTORS))
+    parser.add_argument('--output', type=Path, help='Write the results as JSON to this file')
+    parser.add_argument('--compare', type=Path, help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+    main(args.rounds, args.backends, args.output, args.compare)
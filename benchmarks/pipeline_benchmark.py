@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+
+from benchmarks.fixtures import generate_hotels, render_property_card, render_search_page
+from parsers.extractors import extract_hotels
+from utils.constants import MAX_WORKERS
+
+
+# Function to stand in for the browser: wait like a page load and return the page source
+def fake_browser_fetch(page_source: str, latency: float) -> str:
+    time.sleep(latency)
+    return page_source
+
+
+# Function to fetch and parse in the same thread, as the bot did before the split
+def fetch_and_parse(page_source: str, latency: float, backend: str) -> int:
+    return len(extract_hotels(fake_browser_fetch(page_source, latency), backend))
+
+
+# Function to run the searches with fetching and parsing in one thread pool
+async def run_single_pool(page_source: str, searches: int, latency: float, backend: str) -> float:
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as threads:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            loop.run_in_executor(threads, fetch_and_parse, page_source, latency, backend) for _ in range(searches)
+        ))
+        return time.perf_counter() - start
+
+
+# Function to run the searches with fetching in a thread pool and parsing in a process pool
+async def run_split_pools(page_source: str, searches: int, latency: float, backend: str) -> float:
+    loop = asyncio.get_running_loop()
+
+    async def search(threads: ThreadPoolExecutor, processes: ProcessPoolExecutor) -> int:
+        fetched = await loop.run_in_executor(threads, fake_browser_fetch, page_source, latency)
+        return len(await loop.run_in_executor(processes, partial(extract_hotels, backend=backend), fetched))
+
+    with (
+        ThreadPoolExecutor(max_workers=MAX_WORKERS) as threads,
+        ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn')) as processes
+    ):
+        # Start the worker processes before timing, the bot pays this cost only once
+        await asyncio.gather(*(
+            loop.run_in_executor(processes, extract_hotels, page_source) for _ in range(os.cpu_count())
+        ))
+        start = time.perf_counter()
+        await asyncio.gather(*(search(threads, processes) for _ in range(searches)))
+        return time.perf_counter() - start
+
+
+async def main(searches: int, cards: int, latency: float, backend: str) -> None:
+    hotels = generate_hotels('Pipeline', cards)
+    page_source = render_search_page('Pipeline', [render_property_card(hotel) for hotel in hotels])
+    print(
+        f'{searches} concurrent searches, {cards} cards per page, {latency}s browser time, '
+        f'{backend} backend, {MAX_WORKERS} threads, {os.cpu_count()} processes'
+    )
+
+    for name, run in (('single thread pool', run_single_pool), ('threads + processes', run_split_pools)):
+        elapsed = await run(page_source, searches, latency, backend)
+        print(f'{name:>20}: {elapsed:.2f}s, {searches / elapsed:.2f} searches/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare throughput of the single pool and split pool pipelines')
+    parser.add_argument('--searches', type=int, default=16)
+    parser.add_argument('--cards', type=int, default=75)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--backend', default='bs4')
+    args = parser.parse_args()
+    asyncio.run(main(args.searches, args.cards, args.latency, args.backend))
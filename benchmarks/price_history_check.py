@@ -0,0 +1,65 @@
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from benchmarks.db_benchmark import FORM_VALUES
+from benchmarks.fixtures import generate_hotels
+from database.db_class import DataBase
+
+
+# Function to copy hotels with new prices
+def with_prices(hotels: list[dict[str, Any]], prices: list[int]) -> list[dict[str, Any]]:
+    return [{**hotel, 'Price': price} for hotel, price in zip(hotels, prices)]
+
+
+# Function to refresh an info panel with the given hotels and return the hotels reported as cheaper
+async def refresh(db: DataBase, info_panel_id: int, hotels_info: list[dict[str, Any]]) -> list[str]:
+    price_drops = await db.update_hotels_info_panel(info_panel_id, hotels_info, len(hotels_info), 'now')
+    # The history keeps one price per second, wait so the next refresh gets its own rows
+    await asyncio.sleep(1.1)
+    return sorted(price_drop.get('name') for price_drop in price_drops)
+
+
+# Function to check that price drops are only reported against the history of the same hotel, also after hotels have
+# left the info panel and unused hotels have been deleted
+async def check(db: DataBase) -> list[str]:
+    x, a, c = generate_hotels('Paris', 3)
+    failures = []
+
+    info_panel_id = await db.insert_user_data(1, 1, 2, 'now', with_prices([x, a], [100, 200]), *FORM_VALUES)
+    await asyncio.sleep(1.1)
+
+    # A leaves the panel and the cleanup of the expiry scheduler runs
+    await refresh(db, info_panel_id, with_prices([x], [100]))
+    await db.delete_unused_hotels()
+
+    # A hotel never seen before has no last price, so it can't be reported as cheaper
+    price_drops = await refresh(db, info_panel_id, with_prices([x, c], [100, 150]))
+    if price_drops:
+        failures.append(f'new hotel reported as cheaper: {price_drops}')
+
+    # A hotel coming back is compared with its own last price
+    price_drops = await refresh(db, info_panel_id, with_prices([x, a, c], [100, 150, 150]))
+    if price_drops != [a['Name']]:
+        failures.append(f'returning hotel drops {price_drops}, expected {[a["Name"]]}')
+    return failures
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DataBase(str(Path(work_dir) / 'bot.db'))
+        await db.create_db()
+        failures = await check(db)
+        await db.close()
+
+    for failure in failures:
+        print(failure)
+    print('price history: ' + ('FAILED' if failures else 'ok'))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
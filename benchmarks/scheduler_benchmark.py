@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Optional
+
+from utils.constants import MAX_WORKERS, USER_MAX_SCRAPES
+from utils.scheduler import Priority, ScrapeScheduler
+from utils.utils import run_in_executor, executor_shutdown
+
+
+# Function to stand in for a browser scrape
+def fake_scrape(latency: float) -> None:
+    time.sleep(latency)
+
+
+# Function to time a scrape from the moment it was requested
+async def timed_scrape(scheduler: Optional[ScrapeScheduler], user_id: int, priority: Priority, latency: float) -> float:
+    start = time.perf_counter()
+    if scheduler is None:
+        await run_in_executor(fake_scrape, latency)
+    else:
+        # Wait for a slot the way scrape_page does before it starts the browser
+        async with scheduler.slot(user_id, priority):
+            await run_in_executor(fake_scrape, latency)
+    return time.perf_counter() - start
+
+
+# Function to run one bulk refresh and a few single refreshes of other users that arrive right after it
+async def run_scenario(
+    scheduler: Optional[ScrapeScheduler], bulk_scrapes: int, users: int, latency: float
+) -> list[float]:
+    bulk = [
+        asyncio.create_task(timed_scrape(scheduler, 0, Priority.BULK_REFRESH, latency)) for _ in range(bulk_scrapes)
+    ]
+    await asyncio.sleep(0.01)
+    interactive = await asyncio.gather(*(
+        timed_scrape(scheduler, user_id, Priority.INTERACTIVE, latency) for user_id in range(1, users + 1)
+    ))
+    await asyncio.gather(*bulk)
+    return interactive
+
+
+async def main(bulk_scrapes: int, users: int, latency: float) -> None:
+    print(
+        f'one user refreshes {bulk_scrapes} pages, {users} other users press Refresh, {latency}s per scrape, '
+        f'{MAX_WORKERS} workers, {USER_MAX_SCRAPES} per user'
+    )
+    try:
+        for name, scheduler in (('FIFO executor', None), ('scheduler', ScrapeScheduler(MAX_WORKERS, USER_MAX_SCRAPES))):
+            latencies = await run_scenario(scheduler, bulk_scrapes, users, latency)
+            print(
+                f'{name:>14}: Refresh latency avg {statistics.mean(latencies):.2f}s, max {max(latencies):.2f}s'
+            )
+    finally:
+        await executor_shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure Refresh latency while another user's bulk refresh runs")
+    parser.add_argument('--bulk-scrapes', type=int, default=18)
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.bulk_scrapes, args.users, args.latency))
@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from typing import Optional
+
 from environs import Env
 
 
@@ -12,6 +14,8 @@ class DatabaseConfig:
 @dataclass
 class TgBot:
     token: str
+    # Address of a self-hosted Bot API server, the official one is used when it is not set
+    api_server: Optional[str] = None
 
 
 # Define a dataclass to store the overall application configuration
@@ -30,7 +34,8 @@ def load_config(path: str) -> Config:
     # Create and return a Config instance with the loaded settings
     return Config(
         tg_bot=TgBot(
-            token=env('BOT_TOKEN')
+            token=env('BOT_TOKEN'),
+            api_server=env('TELEGRAM_API_SERVER', None)
         ),
         db_config=DatabaseConfig(
             database=env('DATABASE')
@@ -1,15 +1,324 @@
+import asyncio
+import itertools
+import json
+import time
+import sqlite3
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional
+from urllib.parse import urlsplit, urlunsplit
+
 import aiosqlite
-from typing import Any, Optional
+
+from parsers.extractors import get_hotel_key
+from utils.constants import DB_CACHE_SIZE, DB_MMAP_SIZE
+
+
+# Function to split a hotel link into the link shared by every search and the parameters of this search
+def split_hotel_link(link: str) -> tuple[str, str]:
+    parts = urlsplit(link)
+    base = urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+    # Keep the whole link in the shared part if it can't be rebuilt from the two parts
+    if not link.startswith(base):
+        return link, ''
+    return base, link[len(base):]
+
+
+# Function to build the hotels rows and the hotels_info rows of an info panel, numbering the hotels from the given
+# position, the hotels_info rows reference the hotels by their key
+def make_hotel_rows(
+    info_panel_id: int, hotels_info: list[dict[str, Any]], start: int = 1
+) -> tuple[list[tuple], list[tuple]]:
+    hotel_rows = []
+    hotels_info_rows = []
+    for position, hotel_info in enumerate(hotels_info, start=start):
+        link, link_params = split_hotel_link(hotel_info.get('Link'))
+        hotel_key = get_hotel_key(hotel_info.get('Link'))
+        hotel_rows.append((hotel_key, hotel_info.get('Name'), hotel_info.get('Photo'), link))
+        hotels_info_rows.append((
+            info_panel_id, position, hotel_key, hotel_info.get('Price'), hotel_info.get('Rating'), link_params
+        ))
+    return hotel_rows, hotels_info_rows
+
+
+# Columns of the hotels table users can download
+HOTELS_INFO_COLUMNS = ('Name', 'Price ($)', 'Rating', 'Destination', 'Check-in', 'Check-out', 'Photo', 'Link')
+
+# Orders of the hotels table users can download, ties keep the order of the info panels
+HOTELS_INFO_ORDERS = {
+    'price': 'price, rating DESC, hotels_info.info_panel_id, position',
+    'rating': 'rating DESC, price, hotels_info.info_panel_id, position'
+}
+
+
+# Function to stream the hotels of all info panels of a user row by row in the given order, it opens its own read-only
+# connection, so it can run outside the event loop and even in another process
+def iter_hotels_info(path: str, user_id: int, order_by: str) -> Iterator[tuple]:
+    conn = sqlite3.connect(f'{Path(path).resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        yield from conn.execute(f'''
+            SELECT name, price, rating, destination, check_in, check_out, photo, hotels.link || link_params
+            FROM hotels_info
+            JOIN hotels ON hotels_info.hotel_id = hotels.hotel_id
+            JOIN forms ON hotels_info.info_panel_id = forms.info_panel_id
+            WHERE hotels_info.info_panel_id IN (
+                SELECT info_panels_id.info_panel_id FROM info_panels_id
+                WHERE user_id = ?
+            )
+            ORDER BY {HOTELS_INFO_ORDERS[order_by]}
+        ''', (user_id,))
+    finally:
+        conn.close()
 
 
 class DataBase:
-    # Initialize the database with the given file path
+    # Initialize the database with the given file path, the connections are opened by create_db
     def __init__(self, path: str) -> None:
         self.path = path
+        self.writer: Optional[aiosqlite.Connection] = None
+        self.reader: Optional[aiosqlite.Connection] = None
+        # SQLite allows a single writer, so writes queue for the writer connection instead of failing as busy
+        self.write_lock = asyncio.Lock()
+        self.connect_lock = asyncio.Lock()
+
+    # Open a connection with the pragmas used by the bot
+    async def open_connection(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        # Readers don't block the writer and the writer doesn't block readers in the write-ahead log mode
+        await conn.execute('PRAGMA journal_mode=WAL')
+        # Sync to disk on checkpoints only, a power loss can lose the last transactions but never corrupts the file
+        await conn.execute('PRAGMA synchronous=NORMAL')
+        await conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+        # A negative cache size is in kibibytes instead of pages
+        await conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE // 1024}')
+        return conn
+
+    # Open the long-lived writer and reader connections if they are not open yet
+    async def connect(self) -> None:
+        async with self.connect_lock:
+            if self.writer is None:
+                self.writer = await self.open_connection()
+            if self.reader is None:
+                self.reader = await self.open_connection()
+
+    # Close both connections after the write in progress has been committed
+    async def close(self) -> None:
+        async with self.write_lock:
+            for conn in (self.reader, self.writer):
+                if conn is not None:
+                    await conn.close()
+            self.writer = None
+            self.reader = None
+
+    # Context manager giving the reader connection, which sees the last committed data
+    @asynccontextmanager
+    async def reading(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self.reader is None:
+            await self.connect()
+        yield self.reader
+
+    # Context manager giving the writer connection to one caller at a time, committing everything done with it at the
+    # end or rolling it back on an error
+    @asynccontextmanager
+    async def writing(self) -> AsyncIterator[aiosqlite.Connection]:
+        async with self.write_lock:
+            if self.writer is None:
+                await self.connect()
+            conn = self.writer
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
+
+    # Create the shared hotels table and the hotels_info table with the hotels of every info panel
+    @staticmethod
+    async def create_hotels_tables(conn: aiosqlite.Connection) -> None:
+        # Ids of deleted hotels are never reused, so a new hotel can't take over the price history of an old one
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS hotels (
+                hotel_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                hotel_key TEXT UNIQUE,
+                name TEXT,
+                photo TEXT,
+                link TEXT
+            )
+        ''')
+        # Without a rowid the rows are stored in the primary key order and the key isn't stored twice
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS hotels_info (
+                info_panel_id INTEGER,
+                position INT,
+                hotel_id INTEGER,
+                price INTEGER,
+                rating REAL,
+                link_params TEXT,
+                PRIMARY KEY (info_panel_id, position),
+                FOREIGN KEY (info_panel_id) REFERENCES users_info_panels (info_panel_id),
+                FOREIGN KEY (hotel_id) REFERENCES hotels (hotel_id)
+            ) WITHOUT ROWID
+        ''')
+
+    # Insert the hotels of an info panel from the given position, adding new hotels to the shared hotels table
+    @staticmethod
+    async def write_hotels(
+        conn: aiosqlite.Connection, info_panel_id: int, hotels_info: list[dict[str, Any]], start: int = 1
+    ) -> None:
+        hotel_rows, hotels_info_rows = make_hotel_rows(info_panel_id, hotels_info, start)
+        # Insert new hotels and keep the name and photo of known hotels up to date, unchanged hotels aren't rewritten
+        await conn.executemany('''
+            INSERT INTO hotels (hotel_key, name, photo, link)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (hotel_key) DO UPDATE SET name = excluded.name, photo = excluded.photo, link = excluded.link
+            WHERE (name, photo, link) IS NOT (excluded.name, excluded.photo, excluded.link)
+        ''', hotel_rows)
+        # Insert the price, rating and link parameters of every hotel in this info panel
+        await conn.executemany('''
+            INSERT INTO hotels_info (
+                info_panel_id, position, hotel_id, price, rating, link_params
+            )
+            VALUES (?, ?, (SELECT hotel_id FROM hotels WHERE hotel_key = ?), ?, ?, ?)
+        ''', hotels_info_rows)
+
+    # Get the hotels of an info panel that are cheaper than the last price recorded in their price history
+    @staticmethod
+    async def get_price_drops(conn: aiosqlite.Connection, info_panel_id: int) -> list[dict[str, Any]]:
+        async with conn.execute('''
+            SELECT name, price, last_price FROM (
+                SELECT hotels_info.hotel_id, price, (
+                    SELECT price FROM price_history
+                    WHERE price_history.info_panel_id = hotels_info.info_panel_id
+                    AND price_history.hotel_id = hotels_info.hotel_id
+                    ORDER BY recorded_at DESC LIMIT 1
+                ) AS last_price FROM hotels_info
+                WHERE info_panel_id = ?
+            )
+            JOIN hotels USING (hotel_id)
+            WHERE price < last_price
+        ''', (info_panel_id,)) as cur:
+            price_drops = await cur.fetchall()
+
+        return [
+            {
+                'name': price_drop[0],
+                'price': price_drop[1],
+                'old_price': price_drop[2]
+            } for price_drop in price_drops
+        ]
+
+    # Append the prices of an info panel that changed since the last snapshot, so the history grows with the number
+    # of changed prices instead of the number of hotels
+    @staticmethod
+    async def write_price_history(conn: aiosqlite.Connection, info_panel_id: int) -> None:
+        # The primary key of price_history finds the last price of a hotel with a single lookup
+        await conn.execute('''
+            INSERT OR REPLACE INTO price_history (info_panel_id, hotel_id, recorded_at, price)
+            SELECT info_panel_id, hotel_id, ?, price FROM hotels_info
+            WHERE info_panel_id = ? AND price IS NOT NULL AND price IS NOT (
+                SELECT price FROM price_history
+                WHERE price_history.info_panel_id = hotels_info.info_panel_id
+                AND price_history.hotel_id = hotels_info.hotel_id
+                ORDER BY recorded_at DESC LIMIT 1
+            )
+        ''', (int(time.time()), info_panel_id))
+
+    # Move hotels from the old hotels_info table, which stored a full copy of every hotel, to the shared hotels table
+    async def migrate_hotels_info(self, conn: aiosqlite.Connection) -> None:
+        async with conn.execute('PRAGMA table_info(hotels_info)') as cur:
+            columns = [column[1] for column in await cur.fetchall()]
+        if 'name' not in columns:
+            return
+
+        await conn.execute('ALTER TABLE hotels_info RENAME TO hotels_info_old')
+        await self.create_hotels_tables(conn)
+        async with conn.execute('''
+            SELECT info_panel_id, position, name, price, rating, photo, link FROM hotels_info_old
+            ORDER BY info_panel_id, position
+        ''') as cur:
+            old_hotels_info = await cur.fetchall()
+        # Write the hotels of every info panel the same way new info panels are written
+        for info_panel_id, rows in itertools.groupby(old_hotels_info, key=lambda row: row[0]):
+            rows = list(rows)
+            panel_hotels = [
+                {'Name': name, 'Price': price, 'Rating': rating, 'Photo': photo, 'Link': link}
+                for _, _, name, price, rating, photo, link in rows
+            ]
+            await self.write_hotels(conn, info_panel_id, panel_hotels, rows[0][1])
+        await conn.execute('DROP TABLE hotels_info_old')
+
+    # Create the price history table. A database created before it starts with the current prices of its info panels,
+    # so the first refresh after the upgrade can already report price drops
+    @staticmethod
+    async def create_price_history(conn: aiosqlite.Connection) -> None:
+        async with conn.execute('''
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'table' AND name = 'price_history'
+        ''') as cur:
+            price_history_table = await cur.fetchone()
+
+        # Only price changes are stored, the price of a hotel at any time is the last row recorded before it
+        await conn.execute('''
+            CREATE TABLE IF NOT EXISTS price_history (
+                info_panel_id INTEGER,
+                hotel_id INTEGER,
+                recorded_at INTEGER,
+                price INTEGER,
+                PRIMARY KEY (info_panel_id, hotel_id, recorded_at),
+                FOREIGN KEY (info_panel_id) REFERENCES users_info_panels (info_panel_id),
+                FOREIGN KEY (hotel_id) REFERENCES hotels (hotel_id)
+            ) WITHOUT ROWID
+        ''')
+        if not price_history_table:
+            await conn.execute('''
+                INSERT OR REPLACE INTO price_history (info_panel_id, hotel_id, recorded_at, price)
+                SELECT info_panel_id, hotel_id, ?, price FROM hotels_info
+                WHERE price IS NOT NULL
+            ''', (int(time.time()),))
+
+    # Add the flag telling whether an info panel shows the list of hotels to an info_panels table created without it
+    @staticmethod
+    async def migrate_info_panels_list_open(conn: aiosqlite.Connection) -> None:
+        async with conn.execute('PRAGMA table_info(info_panels)') as cur:
+            columns = [column[1] for column in await cur.fetchall()]
+        if 'list_open' not in columns:
+            await conn.execute('ALTER TABLE info_panels ADD COLUMN list_open INTEGER NOT NULL DEFAULT 0')
+
+    # Rebuild a hotels table created without AUTOINCREMENT, keeping the ids of all hotels
+    async def migrate_hotels_autoincrement(self, conn: aiosqlite.Connection) -> None:
+        async with conn.execute('''
+            SELECT sql FROM sqlite_master
+            WHERE type = 'table' AND name = 'hotels'
+        ''') as cur:
+            hotels_table = await cur.fetchone()
+        if not hotels_table or 'AUTOINCREMENT' in hotels_table[0]:
+            return
+
+        # The legacy mode keeps the references of hotels_info and price_history pointing at the hotels table
+        await conn.execute('PRAGMA legacy_alter_table=ON')
+        await conn.execute('ALTER TABLE hotels RENAME TO hotels_old')
+        await conn.execute('PRAGMA legacy_alter_table=OFF')
+        await self.create_hotels_tables(conn)
+        await conn.execute('''
+            INSERT INTO hotels (hotel_id, hotel_key, name, photo, link)
+            SELECT hotel_id, hotel_key, name, photo, link FROM hotels_old
+        ''')
+        await conn.execute('DROP TABLE hotels_old')
+
+    # Switch the database to incremental auto vacuum, so pages freed by deletes can be returned to the file system
+    async def enable_incremental_vacuum(self) -> None:
+        async with self.writing() as conn:
+            async with conn.execute('PRAGMA auto_vacuum') as cur:
+                auto_vacuum = await cur.fetchone()
+            # 2 is INCREMENTAL, an existing database only switches after a full VACUUM, which runs once
+            if auto_vacuum[0] != 2:
+                await conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                await conn.execute('VACUUM')
 
     # Create a new database
     async def create_db(self) -> None:
-        async with aiosqlite.connect(self.path) as conn:
+        await self.enable_incremental_vacuum()
+        async with self.writing() as conn:
             await conn.execute('''
                 CREATE TABLE IF NOT EXISTS info_panels_id (
                     info_panel_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -30,9 +339,11 @@ class DataBase:
                     cur_position INTEGER,
                     cur_list_position INTEGER,
                     length INT,
+                    list_open INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (info_panel_id) REFERENCES users_info_panels (info_panel_id) 
                 )
             ''')
+            await self.migrate_info_panels_list_open(conn)
             await conn.execute('''
                 CREATE TABLE IF NOT EXISTS forms (
                     info_panel_id INTEGER PRIMARY KEY,
@@ -56,28 +367,25 @@ class DataBase:
             await conn.execute('''
                 CREATE INDEX IF NOT EXISTS index_info_panel_id ON forms_children_age (info_panel_id)
             ''')
+            # Move hotels of a database created before the shared hotels table, then create the hotels tables
+            await self.migrate_hotels_info(conn)
+            await self.migrate_hotels_autoincrement(conn)
+            await self.create_hotels_tables(conn)
+            await self.create_price_history(conn)
             await conn.execute('''
-                CREATE TABLE IF NOT EXISTS hotels_info (
-                    info_panel_id INTEGER,
-                    name TEXT,
-                    price INTEGER,
-                    rating REAL,
-                    photo TEXT,
-                    link TEXT,
-                    position INT,
-                    PRIMARY KEY (info_panel_id, position),
-                    FOREIGN KEY (info_panel_id) REFERENCES users_info_panels (info_panel_id)
+                CREATE TABLE IF NOT EXISTS telegram_photos (
+                    photo TEXT PRIMARY KEY,
+                    file_id TEXT
                 )
             ''')
-            await conn.commit()
 
     # Insert user data into the database
     async def insert_user_data(
         self, user_id: int, message_id: int, length: int,
         last_refresh: str, hotels_info: list[dict[str, Any]],
         *form_values: tuple[str, str, str, int, int, int, str, list[Optional[int]]]
-    ) -> None:
-        async with aiosqlite.connect(self.path) as conn:
+    ) -> int:
+        async with self.writing() as conn:
             # Insert user id and message id into info_panels_id table and get the generated info panel id
             async with conn.execute('''
                 INSERT INTO info_panels_id (user_id, message_id) 
@@ -101,36 +409,22 @@ class DataBase:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (info_panel_id, destination, check_in, check_out, adults, children, rooms, order_by))
 
-            # Insert each child's age into the forms_children_age table
-            for age in children_age:
-                await conn.execute('''
-                    INSERT INTO forms_children_age (info_panel_id, age)
-                    VALUES (?, ?)
-                ''', (info_panel_id, age))
-
-            # Insert hotel information into the hotels_info table with the corresponding position
-            for position, hotel_info in enumerate(hotels_info, start=1):
-                await conn.execute('''
-                    INSERT INTO hotels_info (
-                        info_panel_id, name, price, rating, photo, link, position
-                    ) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        info_panel_id,
-                        hotel_info.get('Name'),
-                        hotel_info.get('Price'),
-                        hotel_info.get('Rating'),
-                        hotel_info.get('Photo'),
-                        hotel_info.get('Link'),
-                        position
-                    )
-                )
+            # Insert all children's ages into the forms_children_age table at once
+            await conn.executemany('''
+                INSERT INTO forms_children_age (info_panel_id, age)
+                VALUES (?, ?)
+            ''', [(info_panel_id, age) for age in children_age])
 
-            await conn.commit()
+            # Insert all hotels into the hotels_info table at once with their positions and record the first prices
+            await self.write_hotels(conn, info_panel_id, hotels_info)
+            await self.write_price_history(conn, info_panel_id)
+
+        # Return the generated info panel id
+        return info_panel_id
 
     # Get an info panel based on user_id and message_id
     async def get_info_panel(self, user_id: int, message_id: int) -> Optional[dict[str, Any]]:
-        async with aiosqlite.connect(self.path) as conn:
+        async with self.reading() as conn:
             async with conn.execute('''
                 SELECT * FROM info_panels
                 WHERE info_panel_id = (
@@ -148,25 +442,27 @@ class DataBase:
             'last_refresh': info_panel[1],
             'cur_position': info_panel[2],
             'cur_list_position': info_panel[3],
-            'length': info_panel[4]
+            'length': info_panel[4],
+            'list_open': bool(info_panel[5])
         }
 
     # Update the current position of an info panel and get the corresponding hotel info
     async def update_position_get_hotel(self, info_panel_id: int, cur_position: int) -> dict[str, Any]:
-        async with aiosqlite.connect(self.path) as conn:
-            # Update the current position in the info_panels table
+        async with self.writing() as conn:
+            # Update the current position in the info_panels table, the info panel shows a single hotel again
             await conn.execute('''
                 UPDATE info_panels
-                SET cur_position = ?
+                SET cur_position = ?, list_open = 0
                 WHERE info_panel_id = ?
             ''', (cur_position, info_panel_id))
-            await conn.commit()
 
-            # Select the hotel information based on the updated position
+            # Select the hotel information based on the updated position and the length hotels appended meanwhile set
             async with conn.execute('''
-                SELECT name, price, rating, photo, link, destination, check_in, check_out
+                SELECT name, price, rating, photo, hotels.link || link_params, destination, check_in, check_out, length
                 FROM hotels_info
+                JOIN hotels ON hotels_info.hotel_id = hotels.hotel_id
                 JOIN forms ON hotels_info.info_panel_id = forms.info_panel_id
+                JOIN info_panels ON hotels_info.info_panel_id = info_panels.info_panel_id
                 WHERE hotels_info.info_panel_id = ? and position = ?
             ''', (info_panel_id, cur_position)) as cur:
                 hotel_info = await cur.fetchone()
@@ -180,29 +476,42 @@ class DataBase:
             'link': hotel_info[4],
             'destination': hotel_info[5],
             'check_in': hotel_info[6],
-            'check_out': hotel_info[7]
+            'check_out': hotel_info[7],
+            'length': hotel_info[8]
         }
 
     # Update the list position and get the corresponding list of hotels
     async def update_list_position_get_hotels(self, info_panel_id: int, cur_list_position: int) -> list[dict[str, Any]]:
-        async with aiosqlite.connect(self.path) as conn:
-            # Update the current list position in the info_panels table
+        async with self.writing() as conn:
+            # Update the current list position in the info_panels table, the info panel shows the list
             await conn.execute('''
                 UPDATE info_panels
-                SET cur_list_position = ?
+                SET cur_list_position = ?, list_open = 1
                 WHERE info_panel_id = ?
             ''', (cur_list_position, info_panel_id))
-            await conn.commit()
 
             # Select a list of hotels based on the updated list position
-            async with conn.execute('''
-                SELECT name, price, rating
-                FROM hotels_info
-                WHERE info_panel_id = ?
-                AND position >= ?
-                AND position < ?
-            ''', (info_panel_id, cur_list_position, cur_list_position + 5)) as cur:
-                hotels_info = await cur.fetchall()
+            return await self.select_list_hotels(conn, info_panel_id, cur_list_position)
+
+    # Get the list of hotels an info panel shows from the current list position
+    async def get_info_panel_list(self, info_panel_id: int, cur_list_position: int) -> list[dict[str, Any]]:
+        async with self.reading() as conn:
+            return await self.select_list_hotels(conn, info_panel_id, cur_list_position)
+
+    # Select the five hotels of an info panel starting at the given list position
+    @staticmethod
+    async def select_list_hotels(
+        conn: aiosqlite.Connection, info_panel_id: int, cur_list_position: int
+    ) -> list[dict[str, Any]]:
+        async with conn.execute('''
+            SELECT name, price, rating
+            FROM hotels_info
+            JOIN hotels ON hotels_info.hotel_id = hotels.hotel_id
+            WHERE info_panel_id = ?
+            AND position >= ?
+            AND position < ?
+        ''', (info_panel_id, cur_list_position, cur_list_position + 5)) as cur:
+            hotels_info = await cur.fetchall()
 
         # Return the list of hotels as a list of dictionaries
         return [
@@ -213,167 +522,262 @@ class DataBase:
             } for hotel_info in hotels_info
         ]
 
-    # Update the hotels_info table with new data and refresh the info panel
+    # Update the hotels_info table with new data, refresh the info panel and return the hotels that got cheaper
     async def update_hotels_info_panel(
             self, info_panel_id: int, hotels_info: list[dict], hotels_info_length: int, last_refresh: str
-    ) -> None:
-        async with aiosqlite.connect(self.path) as conn:
+    ) -> list[dict[str, Any]]:
+        async with self.writing() as conn:
             # Delete existing hotel information for the given info_panel_id
             await conn.execute('''
                 DELETE FROM hotels_info
                 WHERE info_panel_id = ?
             ''', (info_panel_id,))
 
-            # Insert new hotel information into the hotels_info table
-            for position, hotel_info in enumerate(hotels_info, start=1):
-                await conn.execute('''
-                    INSERT INTO hotels_info (
-                        info_panel_id, name, price, rating, photo, link, position
-                    ) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        info_panel_id, hotel_info.get('Name'), hotel_info.get('Price'),
-                        hotel_info.get('Rating'), hotel_info.get('Photo'), hotel_info.get('Link'),
-                        position
-                    )
-                )
+            # Insert all new hotels into the hotels_info table at once
+            await self.write_hotels(conn, info_panel_id, hotels_info)
+
+            # Compare the new prices with the last snapshot before recording them
+            price_drops = await self.get_price_drops(conn, info_panel_id)
+            await self.write_price_history(conn, info_panel_id)
 
-            # Update the last refresh time and reset the current positions in the info_panels table
+            # Update the last refresh time and reset the current positions and view in the info_panels table
             await conn.execute('''
                 UPDATE info_panels
-                SET last_refresh = ?, cur_position = ?, cur_list_position = ?, length = ?
+                SET last_refresh = ?, cur_position = ?, cur_list_position = ?, length = ?, list_open = 0
                 WHERE info_panel_id = ?
             ''', (last_refresh, 1, 1, hotels_info_length, info_panel_id))
 
-            await conn.commit()
+        return price_drops
 
-    # Get form and info panel information for a specific info panel based on user_id and message_id
-    async def get_form_info_panel(self, user_id: int, message_id: int) -> Optional[dict[str, Any]]:
-        async with aiosqlite.connect(self.path) as conn:
-            # Select the info panel id, message id and last refresh time from the info_panels_id table
+    # Replace the hotels of an info panel with a longer list, which may place new hotels before the earlier ones, and
+    # move the current positions with the hotels the user is looking at. Get the current position, new length and link
+    async def merge_hotels_info(self, info_panel_id: int, hotels_info: list[dict]) -> Optional[dict[str, Any]]:
+        async with self.writing() as conn:
+            # Select the hotels at the current position and at the top of the current list page
             async with conn.execute('''
-                SELECT info_panels_id.info_panel_id, message_id, last_refresh FROM info_panels_id
-                JOIN info_panels ON info_panels_id.info_panel_id = info_panels.info_panel_id
-                WHERE user_id = ? AND message_id = ?
-            ''', (user_id, message_id)) as cur:
+                SELECT (
+                    SELECT hotel_id FROM hotels_info
+                    WHERE hotels_info.info_panel_id = info_panels.info_panel_id AND position = cur_position
+                ), (
+                    SELECT hotel_id FROM hotels_info
+                    WHERE hotels_info.info_panel_id = info_panels.info_panel_id AND position = cur_list_position
+                ) FROM info_panels
+                WHERE info_panel_id = ?
+            ''', (info_panel_id,)) as cur:
                 info_panel = await cur.fetchone()
 
-            # Return None if no info panel is found
+            # Return None if the info panel has been deleted in the meantime
             if not info_panel:
-                return
-            # Get info panel id
-            info_panel_id = info_panel[0]
+                return None
+            hotel_id, list_hotel_id = info_panel
+
+            # Insert all hotels at once in their new positions and record the prices of hotels not seen before
+            await conn.execute('''
+                DELETE FROM hotels_info
+                WHERE info_panel_id = ?
+            ''', (info_panel_id,))
+            await self.write_hotels(conn, info_panel_id, hotels_info)
+            await self.write_price_history(conn, info_panel_id)
 
-            # Get the form data from the forms table
+            # Update the length and move the current positions to the new positions of the same hotels, the list
+            # position stays at the start of a list page
+            await conn.execute('''
+                UPDATE info_panels
+                SET length = ?, cur_position = COALESCE((
+                    SELECT MIN(position) FROM hotels_info
+                    WHERE info_panel_id = info_panels.info_panel_id AND hotel_id = ?
+                ), cur_position), cur_list_position = COALESCE((
+                    SELECT 1 + 5 * ((MIN(position) - 1) / 5) FROM hotels_info
+                    WHERE info_panel_id = info_panels.info_panel_id AND hotel_id = ?
+                ), cur_list_position)
+                WHERE info_panel_id = ?
+            ''', (len(hotels_info), hotel_id, list_hotel_id, info_panel_id))
+
+        # Return the current position, new length and link the keyboard has to show
+        return await self.get_info_panel_pager(info_panel_id)
+
+    # Get the current positions, length, current hotel link and view of an info panel, the state its keyboard has to
+    # show
+    async def get_info_panel_pager(self, info_panel_id: int) -> Optional[dict[str, Any]]:
+        async with self.reading() as conn:
             async with conn.execute('''
-                SELECT * FROM forms
-                WHERE info_panel_id = ? 
+                SELECT cur_position, length, hotels.link || link_params, cur_list_position, list_open FROM info_panels
+                JOIN hotels_info ON info_panels.info_panel_id = hotels_info.info_panel_id
+                AND hotels_info.position = info_panels.cur_position
+                JOIN hotels ON hotels_info.hotel_id = hotels.hotel_id
+                WHERE info_panels.info_panel_id = ?
             ''', (info_panel_id,)) as cur:
-                form = await cur.fetchone()
+                info_panel = await cur.fetchone()
 
-            # Get the children's ages from the forms_children_age table
+        # Return None if the info panel has been deleted in the meantime
+        if not info_panel:
+            return None
+        return {
+            'cur_position': info_panel[0],
+            'length': info_panel[1],
+            'link': info_panel[2],
+            'cur_list_position': info_panel[3],
+            'list_open': bool(info_panel[4])
+        }
+
+    # Get form and info panel information for a specific info panel based on user_id and message_id
+    async def get_form_info_panel(self, user_id: int, message_id: int) -> Optional[dict[str, Any]]:
+        async with self.reading() as conn:
+            # Select the info panel, its form and the children's ages as a JSON array in one query
             async with conn.execute('''
-                SELECT age FROM forms_children_age
-                WHERE info_panel_id = ?
-            ''', (info_panel_id,)) as cur:
-                form_children_age = await cur.fetchall()
+                SELECT info_panels_id.info_panel_id, message_id, last_refresh,
+                    destination, check_in, check_out, adults, children, rooms, order_by, (
+                        SELECT json_group_array(age) FROM forms_children_age
+                        WHERE forms_children_age.info_panel_id = info_panels_id.info_panel_id
+                    )
+                FROM info_panels_id
+                JOIN info_panels ON info_panels_id.info_panel_id = info_panels.info_panel_id
+                JOIN forms ON info_panels_id.info_panel_id = forms.info_panel_id
+                WHERE user_id = ? AND message_id = ?
+            ''', (user_id, message_id)) as cur:
+                form_info_panel = await cur.fetchone()
 
-            # Return the collected information as a dictionary
-            return {
-                'info_panel_id': info_panel[0],
-                'message_id': info_panel[1],
-                'last_refresh': info_panel[2],
-                'destination': form[1],
-                'check_in': form[2],
-                'check_out': form[3],
-                'adults': form[4],
-                'children': form[5],
-                'rooms': form[6],
-                'order_by': form[7],
-                'children_age': [age[0] for age in form_children_age] if form_children_age else []
-            }
+        # Return None if no info panel is found
+        if not form_info_panel:
+            return
+        # Return the collected information as a dictionary
+        return {
+            'info_panel_id': form_info_panel[0],
+            'message_id': form_info_panel[1],
+            'last_refresh': form_info_panel[2],
+            'destination': form_info_panel[3],
+            'check_in': form_info_panel[4],
+            'check_out': form_info_panel[5],
+            'adults': form_info_panel[6],
+            'children': form_info_panel[7],
+            'rooms': form_info_panel[8],
+            'order_by': form_info_panel[9],
+            'children_age': json.loads(form_info_panel[10])
+        }
 
     # Get all forms and info panels information for a specific info panel based on user_id
     async def get_all_forms_info_panels(self, user_id: int) -> Optional[list[dict[str, Any]]]:
-        async with aiosqlite.connect(self.path) as conn:
-            # Select the info panels ids, messages ids and last refresh times from the info_panels_id table
+        async with self.reading() as conn:
+            # Select the info panels, their forms and the children's ages as JSON arrays in one query
             async with conn.execute('''
-                SELECT info_panels_id.info_panel_id, message_id, last_refresh FROM info_panels_id
+                SELECT info_panels_id.info_panel_id, message_id, last_refresh,
+                    destination, check_in, check_out, adults, children, rooms, order_by, (
+                        SELECT json_group_array(age) FROM forms_children_age
+                        WHERE forms_children_age.info_panel_id = info_panels_id.info_panel_id
+                    )
+                FROM info_panels_id
                 JOIN info_panels ON info_panels_id.info_panel_id = info_panels.info_panel_id
-                WHERE user_id = ?  
+                JOIN forms ON info_panels_id.info_panel_id = forms.info_panel_id
+                WHERE user_id = ?
+                ORDER BY info_panels_id.info_panel_id
             ''', (user_id,)) as cur:
-                info_panels = await cur.fetchall()
+                forms_info_panels = await cur.fetchall()
+
+        # Return None if no info panels are found
+        if not forms_info_panels:
+            return
+        # Return a list of dictionaries containing all collected information
+        return [
+            {
+                'info_panel_id': form_info_panel[0],
+                'message_id': form_info_panel[1],
+                'last_refresh': form_info_panel[2],
+                'destination': form_info_panel[3],
+                'check_in': form_info_panel[4],
+                'check_out': form_info_panel[5],
+                'adults': form_info_panel[6],
+                'children': form_info_panel[7],
+                'rooms': form_info_panel[8],
+                'order_by': form_info_panel[9],
+                'children_age': json.loads(form_info_panel[10])
+            } for form_info_panel in forms_info_panels
+        ]
 
-            # Return None if no info panels are found
-            if not info_panels:
-                return
+    # Delete an info panel and all related data from the database
+    async def delete_info_panel(self, info_panel_id: int) -> None:
+        await self.delete_info_panels([info_panel_id])
 
-            # Get the forms data from the forms table
+    # Delete several info panels and all related data from the database in one transaction
+    async def delete_info_panels(self, info_panel_ids: list[int]) -> None:
+        if not info_panel_ids:
+            return
+        placeholders = ', '.join('?' * len(info_panel_ids))
+        async with self.writing() as conn:
+            for table in (
+                'info_panels_id', 'info_panels', 'forms', 'forms_children_age', 'hotels_info', 'price_history'
+            ):
+                await conn.execute(f'''
+                    DELETE FROM {table}
+                    WHERE info_panel_id IN ({placeholders})
+                ''', info_panel_ids)
+
+    # Get the check-in date of every info panel, used to schedule the deletion of expired panels
+    async def get_all_info_panels_check_in(self) -> list[dict[str, Any]]:
+        async with self.reading() as conn:
             async with conn.execute('''
-                SELECT * FROM forms
-                WHERE info_panel_id IN (
-                    SELECT info_panel_id FROM info_panels_id
-                    WHERE user_id = ?
-                )
-            ''', (user_id,)) as cur:
-                forms = await cur.fetchall()
-
-            # Get the children's ages from the forms_children_age table
-            forms_children_age = []
-            for info_panel in info_panels:
-                info_panel_id = info_panel[0]
-                async with conn.execute('''
-                    SELECT age FROM forms_children_age
-                    WHERE info_panel_id = ?
-                ''', (info_panel_id,)) as cur:
-                    form_children_age = await cur.fetchall()
-                forms_children_age.append([age[0] for age in form_children_age] if form_children_age else [])
+                SELECT info_panels_id.info_panel_id, user_id, message_id, check_in FROM info_panels_id
+                JOIN forms ON info_panels_id.info_panel_id = forms.info_panel_id
+            ''') as cur:
+                info_panels = await cur.fetchall()
 
-        # Return a list of dictionaries containing all collected information
         return [
             {
                 'info_panel_id': info_panel[0],
-                'message_id': info_panel[1],
-                'last_refresh': info_panel[2],
-                'destination': form[1],
-                'check_in': form[2],
-                'check_out': form[3],
-                'adults': form[4],
-                'children': form[5],
-                'rooms': form[6],
-                'order_by': form[7],
-                'children_age': form_children_age
-            } for info_panel, form, form_children_age in zip(info_panels, forms, forms_children_age)
+                'user_id': info_panel[1],
+                'message_id': info_panel[2],
+                'check_in': info_panel[3]
+            } for info_panel in info_panels
         ]
 
-    # Delete an info panel and all related data from the database
-    async def delete_info_panel(self, info_panel_id: int) -> None:
-        async with aiosqlite.connect(self.path) as conn:
-            await conn.execute('''
-                DELETE FROM info_panels_id
-                WHERE info_panel_id = ?
-            ''', (info_panel_id,))
-            await conn.execute('''
-                DELETE FROM info_panels
-                WHERE info_panel_id = ?
-            ''', (info_panel_id,))
-            await conn.execute('''
-                DELETE FROM forms
-                WHERE info_panel_id = ?
-            ''', (info_panel_id,))
+    # Get the info panels with the given ids that still exist
+    async def get_info_panels_by_ids(self, info_panel_ids: list[int]) -> list[dict[str, int]]:
+        if not info_panel_ids:
+            return []
+        async with self.reading() as conn:
+            async with conn.execute(f'''
+                SELECT info_panel_id, user_id, message_id FROM info_panels_id
+                WHERE info_panel_id IN ({', '.join('?' * len(info_panel_ids))})
+            ''', info_panel_ids) as cur:
+                info_panels = await cur.fetchall()
+
+        return [
+            {
+                'info_panel_id': info_panel[0],
+                'user_id': info_panel[1],
+                'message_id': info_panel[2]
+            } for info_panel in info_panels
+        ]
+
+    # Delete hotels no info panel shows anymore and no price history refers to, together with the file ids of their
+    # photos
+    async def delete_unused_hotels(self) -> None:
+        async with self.writing() as conn:
             await conn.execute('''
-                DELETE FROM forms_children_age
-                WHERE info_panel_id = ?
-            ''', (info_panel_id,))
+                DELETE FROM hotels
+                WHERE hotel_id NOT IN (
+                    SELECT hotel_id FROM hotels_info
+                    UNION
+                    SELECT hotel_id FROM price_history
+                )
+            ''')
             await conn.execute('''
-                DELETE FROM hotels_info
-                WHERE info_panel_id = ?
-            ''', (info_panel_id,))
-            await conn.commit()
+                DELETE FROM telegram_photos
+                WHERE photo NOT IN (SELECT photo FROM hotels)
+            ''')
+
+    # Return up to the given number of free pages to the file system and return how many pages are still free
+    async def incremental_vacuum(self, pages: int) -> int:
+        async with self.writing() as conn:
+            # The pragma frees one page per returned row, so read them all
+            async with conn.execute(f'PRAGMA incremental_vacuum({pages})') as cur:
+                await cur.fetchall()
+            async with conn.execute('PRAGMA freelist_count') as cur:
+                freelist_count = await cur.fetchone()
+        return freelist_count[0]
 
     # Get all info panels for a specific user
     async def get_all_info_panels(self, user_id: int) -> Optional[list[dict[str, int]]]:
-        async with aiosqlite.connect(self.path) as conn:
+        async with self.reading() as conn:
             # Select all info panels ids and messages ids for the given user id
             async with conn.execute('''
                 SELECT info_panel_id, message_id FROM info_panels_id
@@ -394,7 +798,7 @@ class DataBase:
 
     # Count the number of info panels associated with a given user id and return it
     async def count_all_info_panels(self, user_id: int) -> Optional[int]:
-        async with aiosqlite.connect(self.path) as conn:
+        async with self.reading() as conn:
             async with conn.execute('''
                 SELECT COUNT(info_panel_id) FROM info_panels_id
                 WHERE user_id = ?
@@ -404,102 +808,59 @@ class DataBase:
 
     # Get user details from the forms table based on the user_id
     async def get_user_details(self, user_id: int) -> Optional[list[dict[str, Any]]]:
-        async with aiosqlite.connect(self.path) as conn:
-            # Select the form details for all info panels for the user
+        async with self.reading() as conn:
+            # Select the form details and the children's ages as JSON arrays for all info panels of the user
             async with conn.execute('''
-                SELECT info_panel_id, adults, children, rooms, order_by FROM forms
-                WHERE info_panel_id IN (
-                    SELECT info_panel_id FROM info_panels_id
-                    WHERE user_id = ?
+                SELECT adults, children, rooms, order_by, (
+                    SELECT json_group_array(age) FROM forms_children_age
+                    WHERE forms_children_age.info_panel_id = forms.info_panel_id
                 )
+                FROM forms
+                JOIN info_panels_id ON forms.info_panel_id = info_panels_id.info_panel_id
+                WHERE user_id = ?
+                ORDER BY forms.info_panel_id
             ''', (user_id,)) as cur:
                 user_details = await cur.fetchall()
 
-            # Return the user details as a dictionary or None if no details are found
-            if not user_details:
-                return None
-
-            # Select the ages of children for all info panels for the user
-            user_details_children_age = []
-            for user_detail in user_details:
-                info_panel_id = user_detail[0]
-                async with conn.execute('''
-                    SELECT age FROM forms_children_age
-                    WHERE info_panel_id = ? 
-                ''', (info_panel_id,)) as cur:
-                    children_age = await cur.fetchall()
-                user_details_children_age.append([age[0] for age in children_age] if children_age else [])
-
+        # Return the user details as a dictionary or None if no details are found
+        if not user_details:
+            return None
         return [
             {
-                'adults': user_detail[1],
-                'children': user_detail[2],
-                'rooms': user_detail[3],
-                'order_by': user_detail[4],
-                'children_age': children_age
-            } for user_detail, children_age in zip(user_details, user_details_children_age)
+                'adults': user_detail[0],
+                'children': user_detail[1],
+                'rooms': user_detail[2],
+                'order_by': user_detail[3],
+                'children_age': json.loads(user_detail[4])
+            } for user_detail in user_details
         ]
 
-    # Get a list of hotels sorted by rating and price for a given user_id
-    async def get_hotels_info_rating(self, user_id: int) -> Optional[list[dict[str, Any]]]:
-        async with aiosqlite.connect(self.path) as conn:
-            # Select hotel and form details sorted by rating, price from joined hotels_info and forms table
+    # Get the Telegram file id of a hotel photo that has been sent before
+    async def get_photo_file_id(self, photo: str) -> Optional[str]:
+        async with self.reading() as conn:
             async with conn.execute('''
-               SELECT name, price, rating, destination, check_in, check_out, photo, link
-               FROM hotels_info
-               JOIN forms ON hotels_info.info_panel_id = forms.info_panel_id
-               WHERE hotels_info.info_panel_id IN (
-                   SELECT info_panels_id.info_panel_id FROM info_panels_id
-                   WHERE user_id = ? 
-               )
-                ORDER BY rating DESC, price
-            ''', (user_id, )) as cur:
-                hotels_info = await cur.fetchall()
-
-        # Return the list of hotels or None if no hotels are found
-        if not hotels_info:
-            return
-        return [
-            {
-                'Name': hotel_info[0],
-                'Price ($)': hotel_info[1],
-                'Rating': hotel_info[2],
-                'Destination': hotel_info[3],
-                'Check-in': hotel_info[4],
-                'Check-out': hotel_info[5],
-                'Photo': hotel_info[6],
-                'Link': hotel_info[7]
-            } for hotel_info in hotels_info
-        ]
+                SELECT file_id FROM telegram_photos
+                WHERE photo = ?
+            ''', (photo,)) as cur:
+                telegram_photo = await cur.fetchone()
 
-    # Get a list of hotels sorted by price and rating for a given user_id
-    async def get_hotels_info_price(self, user_id: int) -> Optional[list[dict[str, Any]]]:
-        async with aiosqlite.connect(self.path) as conn:
-            # Select hotel and form details sorted by price, rating from joined hotels_info and forms table
-            async with conn.execute('''
-                   SELECT name, price, rating, destination, check_in, check_out, photo, link
-                   FROM hotels_info
-                   JOIN forms ON hotels_info.info_panel_id = forms.info_panel_id
-                   WHERE hotels_info.info_panel_id IN (
-                       SELECT info_panels_id.info_panel_id FROM info_panels_id
-                       WHERE user_id = ? 
-                   )
-                   ORDER BY price, rating DESC
-               ''', (user_id,)) as cur:
-                hotels_info = await cur.fetchall()
-
-        # Return the list of hotels or None if no hotels are found
-        if not hotels_info:
-            return
-        return [
-            {
-                'Name': hotel_info[0],
-                'Price ($)': hotel_info[1],
-                'Rating': hotel_info[2],
-                'Destination': hotel_info[3],
-                'Check-in': hotel_info[4],
-                'Check-out': hotel_info[5],
-                'Photo': hotel_info[6],
-                'Link': hotel_info[7]
-            } for hotel_info in hotels_info
-        ]
+        # Return None if the photo has not been sent yet
+        if not telegram_photo:
+            return None
+        return telegram_photo[0]
+
+    # Save the Telegram file id of a hotel photo
+    async def save_photo_file_id(self, photo: str, file_id: str) -> None:
+        async with self.writing() as conn:
+            await conn.execute('''
+                INSERT OR REPLACE INTO telegram_photos (photo, file_id)
+                VALUES (?, ?)
+            ''', (photo, file_id))
+
+    # Delete the Telegram file id of a hotel photo after Telegram has rejected it
+    async def delete_photo_file_id(self, photo: str) -> None:
+        async with self.writing() as conn:
+            await conn.execute('''
+                DELETE FROM telegram_photos
+                WHERE photo = ?
+            ''', (photo,))
@@ -9,9 +9,10 @@ from aiogram.types import Message, InputMediaPhoto
 
 from database.db_class import DataBase
 from keyboards.inline_kayboards import create_delete_confirmation_keyboard, create_info_panel, create_excel_keyboard
-from parsers.booking_parser import parse_booking
+from parsers.search import search_hotels
+from utils.scheduler import Priority
 from utils.constants import SORT_OPTIONS_DESCRIPTIONS, MIN_REFRESH_TIME, MAX_PANELS
-from utils.utils import run_in_executor, format_date
+from utils.utils import format_date, send_hotel_photo, send_price_drops
 from states.state import Form
 
 # Initialize a router
@@ -31,7 +32,7 @@ async def start(message: Message) -> None:
         "use the /refresh_all command to refresh them.\n"
         "Should you wish to remove all existing info panels, the /delete_all command is available.\n"
         "If you're interested in information about all hotels, use the /get_excel command "
-        "that will provide you this data in Excel format.\n"
+        "that will provide you this data in Excel or CSV format.\n"
         "Lastly, to review the details you've entered, use the /get_form command."
     )
 
@@ -138,10 +139,10 @@ async def show_form_information(message: Message, db: DataBase) -> None:
 
 @command_router.message(Command('get_excel'))
 async def ask_excel_preferences(message: Message) -> None:
-    """Asks the user for his preferences on how to sort data in the Excel table."""
+    """Asks the user for his preferences on how to sort data in the table and in which format to send it."""
     await message.delete()
     await message.answer(
-        'How would you like to sort data in your excel table?',
+        'How would you like to sort data in your table, and should it be an Excel or a CSV file?',
         reply_markup=await create_excel_keyboard()
     )
 
@@ -161,6 +162,8 @@ async def refresh_all_info_panels(message: Message, bot: Bot, db: DataBase) -> N
 
     # List to store info panels and forms that are still valid
     existing_forms_info_panels = []
+    # List to store ids of expired info panels, they are deleted from the database at once
+    expired_info_panel_ids = []
     # List to store tasks for asynchronous execution
     tasks = []
 
@@ -179,8 +182,8 @@ async def refresh_all_info_panels(message: Message, bot: Bot, db: DataBase) -> N
             # If deletion fails, ignore and continue
             except TelegramBadRequest:
                 pass
-            # Delete the expired info panel from the database and continue loop
-            await db.delete_info_panel(form_info_panel.get('info_panel_id'))
+            # Remember the expired info panel for deletion from the database and continue loop
+            expired_info_panel_ids.append(form_info_panel.get('info_panel_id'))
             await bot.send_message(
                 chat_id=message.from_user.id,
                 text=(
@@ -208,10 +211,9 @@ async def refresh_all_info_panels(message: Message, bot: Bot, db: DataBase) -> N
             )
             continue
 
-        # Create a task to parse hotels
+        # Create a task to parse hotels, bypassing the cache because the user explicitly asked for fresh data
         task = asyncio.create_task(
-            run_in_executor(
-                parse_booking,
+            search_hotels(
                 form_info_panel.get('destination'),
                 form_info_panel.get('check_in'),
                 form_info_panel.get('check_out'),
@@ -219,13 +221,19 @@ async def refresh_all_info_panels(message: Message, bot: Bot, db: DataBase) -> N
                 form_info_panel.get('rooms'),
                 form_info_panel.get('children'),
                 form_info_panel.get('children_age'),
-                form_info_panel.get('order_by')
+                form_info_panel.get('order_by'),
+                use_cache=False,
+                user_id=message.from_user.id,
+                priority=Priority.BULK_REFRESH
             )
         )
         tasks.append(task)
         # Add valid info panel and form
         existing_forms_info_panels.append(form_info_panel)
 
+    # Delete all expired info panels from the database
+    await db.delete_info_panels(expired_info_panel_ids)
+
     # Set the caption to 'Refreshing...' for all existing info panels
     for form_info_panel in existing_forms_info_panels:
         await bot.edit_message_caption(
@@ -253,27 +261,30 @@ async def refresh_all_info_panels(message: Message, bot: Bot, db: DataBase) -> N
         # Get the number of hotels found
         hotels_info_length = len(hotels_info)
 
+        # Prepare the caption and keyboard of the first hotel
+        caption = (
+            f'🏨 <b>{hotels_info[0].get("Name")}</b>\n'
+            f'💸 {hotels_info[0].get("Price")}$\n'
+            f'⭐️ {hotels_info[0].get("Rating") if hotels_info[0].get("Rating") else 'No rating'}\n\n'
+            f'🏙 <b>{form_info_panel.get('destination')}</b>\n'
+            f'🛬 {await format_date(form_info_panel.get('check_in'))}\n'
+            f'🛫 {await format_date(form_info_panel.get('check_out'))}'
+        )
+        reply_markup = await create_info_panel(hotels_info[0].get('Link'), 1, hotels_info_length)
+        message_id = form_info_panel.get('message_id')
+
         # Edit the message media with the new hotel information
-        await bot.edit_message_media(
+        await send_hotel_photo(db, hotels_info[0].get('Photo'), lambda media: bot.edit_message_media(
             chat_id=message.from_user.id,
-            message_id=form_info_panel.get('message_id'),
-            media=InputMediaPhoto(
-                media=hotels_info[0].get('Photo'),
-                caption=(
-                    f'🏨 <b>{hotels_info[0].get("Name")}</b>\n'
-                    f'💸 {hotels_info[0].get("Price")}$\n'
-                    f'⭐️ {hotels_info[0].get("Rating") if hotels_info[0].get("Rating") else 'No rating'}\n\n'
-                    f'🏙 <b>{form_info_panel.get('destination')}</b>\n'
-                    f'🛬 {await format_date(form_info_panel.get('check_in'))}\n'
-                    f'🛫 {await format_date(form_info_panel.get('check_out'))}'
-                )
-            ),
-            reply_markup=await create_info_panel(hotels_info[0].get('Link'), 1, hotels_info_length)
-        )
+            message_id=message_id,
+            media=InputMediaPhoto(media=media, caption=caption),
+            reply_markup=reply_markup
+        ))
 
-        # Update the database with the new hotel information
-        await db.update_hotels_info_panel(
+        # Update the database with the new hotel information and notify the user about hotels that got cheaper
+        price_drops = await db.update_hotels_info_panel(
             form_info_panel.get('info_panel_id'), hotels_info,
             hotels_info_length, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
         )
+        await send_price_drops(bot, message.from_user.id, form_info_panel.get('destination'), price_drops)
         await asyncio.sleep(1)
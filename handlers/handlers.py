@@ -1,16 +1,16 @@
-import os
 import asyncio
 import datetime
 
-import pandas as pd
 from aiogram import Bot, Router, F
-from aiogram.types import CallbackQuery, InputMediaPhoto, FSInputFile
+from aiogram.types import CallbackQuery, InputMediaPhoto, BufferedInputFile
 
 from database.db_class import DataBase
 from keyboards.inline_kayboards import create_info_panel, show_info_panel_list, create_delete_confirmation_keyboard
-from parsers.booking_parser import parse_booking
+from parsers.search import search_hotels
+from utils.scheduler import Priority
 from utils.constants import MIN_REFRESH_TIME
-from utils.utils import run_in_executor, format_date
+from utils.export import EXPORT_FORMATS, export_hotels_info
+from utils.utils import format_date, run_in_process, send_hotel_photo, send_price_drops
 
 # Initialize a router
 router = Router()
@@ -58,23 +58,25 @@ async def change_info_panel(callback_query: CallbackQuery, bot: Bot, db: DataBas
     # Update current info panel position in the db and get hotel based on the new position
     hotel_info = await db.update_position_get_hotel(info_panel_id, cur_position)
 
+    # Prepare the caption and keyboard of the new hotel
+    caption = (
+        f'🏨 <b>{hotel_info.get('name')}</b>\n'
+        f'💸 {hotel_info.get('price')}$\n'
+        f'⭐️ {hotel_info.get('rating') if hotel_info.get('rating') else 'No rating'}\n\n'
+        f'🏙 <b>{hotel_info.get('destination')}</b>\n'
+        f'🛬 {await format_date(hotel_info.get('check_in'))}\n'
+        f'🛫 {await format_date(hotel_info.get('check_out'))}'
+    )
+    # Take the length from the same transaction as the position, hotels may have been appended since the panel was read
+    reply_markup = await create_info_panel(hotel_info.get('link'), cur_position, hotel_info.get('length'))
+
     # Edit the message media with the new hotel information
-    await bot.edit_message_media(
+    await send_hotel_photo(db, hotel_info.get('photo'), lambda media: bot.edit_message_media(
         chat_id=callback_query.message.chat.id,
         message_id=callback_query.message.message_id,
-        media=InputMediaPhoto(
-            media=hotel_info.get('photo'),
-            caption=(
-                f'🏨 <b>{hotel_info.get('name')}</b>\n'
-                f'💸 {hotel_info.get('price')}$\n'
-                f'⭐️ {hotel_info.get('rating') if hotel_info.get('rating') else 'No rating'}\n\n'
-                f'🏙 <b>{hotel_info.get('destination')}</b>\n'
-                f'🛬 {await format_date(hotel_info.get('check_in'))}\n'
-                f'🛫 {await format_date(hotel_info.get('check_out'))}'
-            )
-        ),
-        reply_markup=await create_info_panel(hotel_info.get('link'), cur_position, info_length)
-    )
+        media=InputMediaPhoto(media=media, caption=caption),
+        reply_markup=reply_markup
+    ))
 
 
 # List navigation handler
@@ -210,9 +212,10 @@ async def delete_all_info_panels(callback_query: CallbackQuery, bot: Bot, db: Da
         await callback_query.message.answer('You do not have any info panels. Use /start_form to create them.')
         return
 
-    # Loop over each info panel, delete them from database and delete messages with them
+    # Delete all info panels from database at once
+    await db.delete_info_panels([info_panel.get('info_panel_id') for info_panel in info_panels])
+    # Loop over each info panel and delete messages with them
     for info_panel in info_panels:
-        await db.delete_info_panel(info_panel.get('info_panel_id'))
         await bot.delete_message(
             chat_id=callback_query.from_user.id,
             message_id=info_panel.get('message_id')
@@ -271,9 +274,8 @@ async def refresh_info_panel(callback_query: CallbackQuery, bot: Bot, db: DataBa
         chat_id=callback_query.from_user.id
     )
 
-    # Parse hotels
-    hotels_info = await run_in_executor(
-        parse_booking,
+    # Parse hotels, bypassing the cache because the user explicitly asked for fresh data
+    hotels_info = await search_hotels(
         form_info_panel.get('destination'),
         form_info_panel.get('check_in'),
         form_info_panel.get('check_out'),
@@ -281,7 +283,10 @@ async def refresh_info_panel(callback_query: CallbackQuery, bot: Bot, db: DataBa
         form_info_panel.get('rooms'),
         form_info_panel.get('children'),
         form_info_panel.get('children_age'),
-        form_info_panel.get('order_by')
+        form_info_panel.get('order_by'),
+        use_cache=False,
+        user_id=callback_query.from_user.id,
+        priority=Priority.INTERACTIVE
     )
 
     # If hotel information is missing inform user and exit function
@@ -294,67 +299,54 @@ async def refresh_info_panel(callback_query: CallbackQuery, bot: Bot, db: DataBa
     # Get the number of hotels found
     hotels_info_length = len(hotels_info)
 
+    # Prepare the caption and keyboard of the first hotel
+    caption = (
+        f'🏨 <b>{hotels_info[0].get("Name")}</b>\n'
+        f'💸 {hotels_info[0].get("Price")}$\n'
+        f'⭐️ {hotels_info[0].get("Rating") if hotels_info[0].get("Rating") else 'No rating'}\n\n'
+        f'🏙 <b>{form_info_panel.get('destination')}</b>\n'
+        f'🛬 {await format_date(form_info_panel.get('check_in'))}\n'
+        f'🛫 {await format_date(form_info_panel.get('check_out'))}'
+    )
+    reply_markup = await create_info_panel(hotels_info[0].get('Link'), 1, hotels_info_length)
+
     # Edit the message media with the new hotel information
-    await bot.edit_message_media(
+    await send_hotel_photo(db, hotels_info[0].get('Photo'), lambda media: bot.edit_message_media(
         chat_id=callback_query.from_user.id,
         message_id=callback_query.message.message_id,
-        media=InputMediaPhoto(
-            media=hotels_info[0].get('Photo'),
-            caption=(
-                f'🏨 <b>{hotels_info[0].get("Name")}</b>\n'
-                f'💸 {hotels_info[0].get("Price")}$\n'
-                f'⭐️ {hotels_info[0].get("Rating") if hotels_info[0].get("Rating") else 'No rating'}\n\n'
-                f'🏙 <b>{form_info_panel.get('destination')}</b>\n'
-                f'🛬 {await format_date(form_info_panel.get('check_in'))}\n'
-                f'🛫 {await format_date(form_info_panel.get('check_out'))}'
-            )
-        ),
-        reply_markup=await create_info_panel(hotels_info[0].get('Link'), 1, hotels_info_length)
-    )
+        media=InputMediaPhoto(media=media, caption=caption),
+        reply_markup=reply_markup
+    ))
 
-    # Update the database with the new hotel information
-    await db.update_hotels_info_panel(
+    # Update the database with the new hotel information and notify the user about hotels that got cheaper
+    price_drops = await db.update_hotels_info_panel(
         info_panel_id, hotels_info,
         hotels_info_length, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
     )
+    await send_price_drops(bot, callback_query.from_user.id, form_info_panel.get('destination'), price_drops)
 
 
-# Handler to send an Excel table with information about hotels
-@router.callback_query(F.data.startswith('excel_'))
+# Handler to send an Excel or CSV table with information about hotels
+@router.callback_query(F.data.startswith(('excel_', 'csv_')))
 async def get_excel(callback_query: CallbackQuery, bot: Bot, db: DataBase) -> None:
-    """Generates an Excel file with hotel information based on user's choice and sends it to the user."""
-    # Initialize hotels_info variable
-    hotels_info = None
+    """Generates an Excel or CSV file with hotel information based on user's choice and sends it to the user."""
+    # Get the format and the sorting the user has chosen, e.g. 'excel_price' or 'csv_rating'
+    file_format, order_by = callback_query.data.split('_')
 
-    # Check the specific callback data and get corresponding hotel info
-    if callback_query.data == 'excel_price':
-        hotels_info = await db.get_hotels_info_price(callback_query.from_user.id)
-    elif callback_query.data == 'excel_rating':
-        hotels_info = await db.get_hotels_info_rating(callback_query.from_user.id)
+    # Build the file in the process executor, streaming the hotels straight from the database
+    document = await run_in_process(export_hotels_info, db.path, callback_query.from_user.id, order_by, file_format)
 
     # If no hotel info is available, inform the user and exit function
-    if not hotels_info:
+    if not document:
         await callback_query.answer('You do not have any info panels. Use /start_form to create them.')
         await callback_query.message.delete()
         return
 
     await callback_query.message.delete()
 
-    # Create a DataFrame from the hotel info
-    df = pd.DataFrame(hotels_info)
-    # Save the DataFrame to an Excel file
-    df.to_excel(rf'data\{callback_query.from_user.id}.xlsx', index=False)
-
-    # Prepare the Excel file for sending
-    hotels_info = FSInputFile(
-        rf'data\{callback_query.from_user.id}.xlsx', filename=f'hotels_info.xlsx'
-    )
-
-    # Send the Excel file to the user
+    # Send the file to the user straight from memory
+    _, filename = EXPORT_FORMATS[file_format]
     await bot.send_document(
         chat_id=callback_query.from_user.id,
-        document=hotels_info
+        document=BufferedInputFile(document, filename=filename)
     )
-
-    # Remove the Excel file after sending
-    os.remove(rf'data\{callback_query.from_user.id}.xlsx')
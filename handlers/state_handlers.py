@@ -1,5 +1,7 @@
+import time
 import asyncio
 import datetime
+from typing import Optional
 
 import inflect
 from aiogram.exceptions import TelegramBadRequest
@@ -13,11 +15,14 @@ from database.db_class import DataBase
 from keyboards.inline_kayboards import (
     create_dates_prompting_keyboard, create_quantity_keyboard,
     create_age_keyboard, create_order_by_keyboard,
-    create_info_panel
+    create_info_panel, show_info_panel_list
 )
-from parsers.booking_parser import parse_booking
+from parsers.search import search_hotels_in_stages
+from utils.expiry import expiry_scheduler
+from utils.metrics import metrics
+from utils.scheduler import Priority
 from states.state import Form
-from utils.utils import run_in_executor, format_date
+from utils.utils import format_date, send_hotel_photo
 
 # Initialize a router
 form_router = Router()
@@ -489,79 +494,136 @@ async def process_order_by_selection(callback_query: CallbackQuery, state: FSMCo
         except TelegramBadRequest:
             pass
 
-    # Notify the user that data is being collected
+    # Notify the user that data is being collected, the message shows how many searches are done
     collecting_data_message = await callback_query.message.answer('<b>Collecting data...</b>')
     # Create info panels
-    await create_info_panels(user_data, bot, db)
+    await create_info_panels(user_data, bot, db, collecting_data_message)
     # Delete notifying message
     await collecting_data_message.delete()
 
 
 # Function to create and send information panels to user
-async def create_info_panels(user_data: dict, bot: Bot, db: DataBase) -> None:
-    """Creates and sends information panels to user."""
-    tasks = []
-    # Create tasks for parsing hotel data
-    for destination in user_data.get('destination'):
-        for check_in, check_out in zip(user_data.get('check_in'), user_data.get('check_out')):
-            task = asyncio.create_task(
-                run_in_executor(
-                    parse_booking,
-                    destination,
-                    check_in,
-                    check_out,
-                    user_data.get('adults'),
-                    user_data.get('rooms'),
-                    user_data.get('children'),
-                    user_data.get('children_age'),
-                    user_data.get('order_by')
-                )
-            )
-            tasks.append(task)
-
-    # Wait for all tasks to complete and gather results
-    hotels = await asyncio.gather(*tasks)
-
-    # Create current form counter
-    cur_form = 0
-    # Display new info panels for each hotel
-    for destination in user_data.get('destination'):
-        for check_in, check_out in zip(user_data.get('check_in'), user_data.get('check_out')):
-            hotels_info = hotels[cur_form]
-
-            # Inform user that hotel information is missing and continue loop
-            if not hotels_info:
-                await bot.send_message(
-                    chat_id=user_data.get('user_id'),
-                    text=f'No information about {destination} from {check_in} to {check_out} is available right now.'
-                )
-                # Increment the 'cur_form' counter by 1 to move to the next form
-                cur_form += 1
-                continue
-
-            hotel_info_length = len(hotels_info)
-            # Send a message with hotel information
-            message = await bot.send_photo(
-                chat_id=user_data.get('user_id'),
-                photo=hotels_info[0].get('Photo'),
-                caption=(
+async def create_info_panels(
+    user_data: dict, bot: Bot, db: DataBase, progress_message: Optional[Message] = None
+) -> None:
+    """Sends an info panel for each search as soon as its first results arrive and extends it with the rest."""
+    start = time.perf_counter()
+    user_id = user_data.get('user_id')
+    searches = [
+        (destination, check_in, check_out)
+        for destination in user_data.get('destination')
+        for check_in, check_out in zip(user_data.get('check_in'), user_data.get('check_out'))
+    ]
+    done = 0
+    loop = asyncio.get_running_loop()
+    last_sent = 0.0
+    send_lock = asyncio.Lock()
+
+    # Keep at least a second between messages, like the panels were sent before, to stay under Telegram limits
+    async def wait_send_turn() -> None:
+        nonlocal last_sent
+        await asyncio.sleep(max(0.0, last_sent + 1 - loop.time()))
+        last_sent = loop.time()
+
+    # Count a finished search and update the progress counter of the notifying message
+    async def report_done() -> None:
+        nonlocal done
+        done += 1
+        if progress_message is not None and done < len(searches):
+            try:
+                await progress_message.edit_text(f'<b>Collecting data... {done}/{len(searches)}</b>')
+            except TelegramBadRequest:
+                pass
+
+    # Send the info panel of one search with its first stage and append the hotels of every further stage
+    async def show_search(destination: str, check_in: str, check_out: str) -> None:
+        info_panel_id = message_id = None
+        async for hotels_info in search_hotels_in_stages(
+            destination,
+            check_in,
+            check_out,
+            user_data.get('adults'),
+            user_data.get('rooms'),
+            user_data.get('children'),
+            user_data.get('children_age'),
+            user_data.get('order_by'),
+            user_id=user_id,
+            priority=Priority.NEW_FORM
+        ):
+            async with send_lock:
+                await wait_send_turn()
+
+                # Merge the new hotels into the panel and update the counter, keeping the hotel the user is looking at
+                if info_panel_id is not None:
+                    info_panel = await db.merge_hotels_info(info_panel_id, hotels_info)
+                    # Edit the keyboard until it shows the stored position and view, the user may navigate while it
+                    # is edited
+                    while info_panel:
+                        # Redraw the list with the new number of pages if the user has opened it, otherwise the pager
+                        if info_panel.get('list_open'):
+                            cur_list_position = info_panel.get('cur_list_position')
+                            reply_markup = await show_info_panel_list(
+                                await db.get_info_panel_list(info_panel_id, cur_list_position),
+                                cur_list_position,
+                                (info_panel.get('length') - 1) // 5 + 1
+                            )
+                        else:
+                            reply_markup = await create_info_panel(
+                                info_panel.get('link'), info_panel.get('cur_position'), info_panel.get('length')
+                            )
+                        try:
+                            await bot.edit_message_reply_markup(
+                                chat_id=user_id, message_id=message_id, reply_markup=reply_markup
+                            )
+                        except TelegramBadRequest:
+                            pass
+                        shown_info_panel = info_panel
+                        info_panel = await db.get_info_panel_pager(info_panel_id)
+                        if info_panel == shown_info_panel:
+                            break
+                    # Stop if the user has deleted the info panel in the meantime
+                    if not info_panel:
+                        return
+                    continue
+
+                hotel_info_length = len(hotels_info)
+                # Prepare the caption and keyboard of the first hotel
+                caption = (
                     f'🏨 <b>{hotels_info[0].get("Name")}</b>\n'
                     f'💸 {hotels_info[0].get("Price")}$\n'
                     f'⭐️ {hotels_info[0].get("Rating") if hotels_info[0].get("Rating") else 'No rating'}\n\n'
                     f'🏙 <b>{destination}</b>\n'
                     f'🛬 {await format_date(check_in)}\n'
                     f'🛫 {await format_date(check_out)}'
-                ),
-                reply_markup=await create_info_panel(hotels_info[0].get('Link'), 1, hotel_info_length)
-            )
-            # Insert user data into database
-            await db.insert_user_data(
-                user_data.get('user_id'), message.message_id, hotel_info_length,
-                datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"), hotels_info,
-                destination, check_in, check_out, user_data.get('adults'),
-                user_data.get('children'), user_data.get('rooms'), user_data.get('order_by'),
-                user_data.get('children_age')
-            )
-            # Increment the 'cur_form' counter by 1 to move to the next form
-            cur_form += 1
-            await asyncio.sleep(1)
+                )
+                reply_markup = await create_info_panel(hotels_info[0].get('Link'), 1, hotel_info_length)
+                # Send a message with hotel information
+                message = await send_hotel_photo(db, hotels_info[0].get('Photo'), lambda photo: bot.send_photo(
+                    chat_id=user_id, photo=photo, caption=caption, reply_markup=reply_markup
+                ))
+                message_id = message.message_id
+                # Insert user data into database
+                info_panel_id = await db.insert_user_data(
+                    user_id, message_id, hotel_info_length,
+                    datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"), hotels_info,
+                    destination, check_in, check_out, user_data.get('adults'),
+                    user_data.get('children'), user_data.get('rooms'), user_data.get('order_by'),
+                    user_data.get('children_age')
+                )
+                # Schedule the deletion of the info panel after its check-in date
+                expiry_scheduler.add(info_panel_id, user_id, message_id, check_in)
+            metrics.observe('panels.time_to_first_panel', time.perf_counter() - start)
+            await report_done()
+
+        # Inform user that hotel information is missing
+        if info_panel_id is None:
+            async with send_lock:
+                await wait_send_turn()
+                await bot.send_message(
+                    chat_id=user_id,
+                    text=f'No information about {destination} from {check_in} to {check_out} is available right now.'
+                )
+            await report_done()
+
+    # Run all searches at once, every panel is shown as soon as its own first stage is ready
+    await asyncio.gather(*(show_search(*search) for search in searches))
@@ -181,17 +181,25 @@ async def create_excel_keyboard() -> InlineKeyboardMarkup:
     # Initialize the keyboard builder
     kb_builder = InlineKeyboardBuilder()
 
-    # Add buttons for sorting by price and rating
+    # Add buttons for sorting by price and rating, as an Excel or a CSV file
     kb_builder.button(
-        text='Sort by price',
+        text='Excel, by price',
         callback_data='excel_price'
     )
     kb_builder.button(
-        text='Sort by rating',
+        text='Excel, by rating',
         callback_data='excel_rating'
     )
+    kb_builder.button(
+        text='CSV, by price',
+        callback_data='csv_price'
+    )
+    kb_builder.button(
+        text='CSV, by rating',
+        callback_data='csv_rating'
+    )
 
-    # Arrange buttons into a single column
-    kb_builder.adjust(1)
+    # Arrange buttons into two columns, one row per format
+    kb_builder.adjust(2)
     # Return the constructed inline keyboard markup
     return kb_builder.as_markup()
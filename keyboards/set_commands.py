@@ -27,7 +27,7 @@ async def set_commands(bot: Bot) -> None:
         ),
         BotCommand(
             command='get_excel',
-            description='Get information about all hotels in excel'
+            description='Get information about all hotels in Excel or CSV'
         ),
         BotCommand(
             command='get_form',
@@ -3,64 +3,166 @@ import logging
 import sys
 import random
 from urllib.parse import quote_plus
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.common.exceptions import (
     NoSuchElementException, SessionNotCreatedException, ElementNotInteractableException
 )
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from utils.constants import LOAD_MORE_BUTTON_CLICKS
+from parsers.driver_pool import driver_pool
+from parsers.extractors import extract_hotels
+from utils.constants import (
+    LOAD_MORE_BUTTON_CLICKS, BOOKING_SEARCH_URL, PAGE_SETTLE_TIMEOUT, PAGE_QUIET_PERIOD, PAGE_POLL_INTERVAL,
+    BROWSER_PROFILE
+)
+from utils.metrics import metrics
 
 
 # Configure basic logging to output to standard system output
 logging.basicConfig(level=logging.INFO, stream=sys.stdout)
 
 
+# Script returning the number of property cards, the number of finished network requests and the document state
+PAGE_STATE_SCRIPT = """
+performance.setResourceTimingBufferSize(10000);
+return [
+    document.querySelectorAll('div[data-testid="property-card"]').length,
+    performance.getEntriesByType('resource').length,
+    document.readyState
+];
+"""
+
+
+# Script returning the number of bytes downloaded by the page and the page load time in milliseconds
+NETWORK_STATS_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return [
+    resources.reduce((total, entry) => total + entry.transferSize, navigation ? navigation.transferSize : 0),
+    navigation ? navigation.loadEventEnd - navigation.startTime : 0
+];
+"""
+
+
 # Function to parse hotel booking information
 def parse_booking(
     destination: str, check_in: str, check_out: str, adults: int,
     rooms: int, children: int, children_age: list[Optional[int]], order_by: str
 ) -> Optional[list[dict]]:
-    # Generate the URL for the booking site with the given parameters
-    url = create_url(destination, check_in, check_out, adults, rooms, children, children_age, order_by)
-
-    # Set up options for the Selenium WebDriver
-    options = Options()
-    # Add incognito mode
-    options.add_argument('--incognito')
-    # Run Chrome in headless mode
-    options.add_argument("--headless=new")
-    # Set the window size
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument("--start-maximized")
-    # Set a user agent to mimic a real browser visit
-    options.add_argument(
-        '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-        'AppleWebKit/537.36 (KHTML, like Gecko) '
-        'Chrome/123.0.0.0 Safari/537.36'
-    )
+    # Load the search results with the browser
+    page_source = fetch_page_source(destination, check_in, check_out, adults, rooms, children, children_age, order_by)
+    if page_source is None:
+        return
+
+    # Extract hotel information from the page source
+    return extract_hotels(page_source)
+
+
+# Function to load the search results with a pooled browser and return the page source, optionally passing the page
+# source after the first cards and every 'Load more results' batch to on_stage
+def fetch_page_source(
+    destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    offset: int = 0, load_more_clicks: int = LOAD_MORE_BUTTON_CLICKS,
+    on_stage: Optional[Callable[[str], None]] = None
+) -> Optional[str]:
+    url = create_url(destination, check_in, check_out, adults, rooms, children, children_age, order_by, offset=offset)
+    return browse_search_results(url, destination, read_page_source, load_more_clicks, on_stage)
 
-    # Initialize the WebDriver and navigate to the URL
+
+# Function to read the whole page source from the browser
+def read_page_source(driver: webdriver.Chrome) -> str:
+    page_source = driver.page_source
+    metrics.observe('parser.transfer_bytes', len(page_source))
+    return page_source
+
+
+# Function to open the search page with a pooled browser and collect the results with the given function, optionally
+# passing the results collected after the first cards and every 'Load more results' batch to on_stage
+def browse_search_results(
+    url: str, destination: str, collect: Callable[[webdriver.Chrome], Any], load_more_clicks: int,
+    on_stage: Optional[Callable[[Any], None]] = None
+) -> Optional[Any]:
+    # Lease a warm WebDriver from the pool and load the search results
     try:
-        driver = webdriver.Chrome(options=options)
-        driver.get(url=url)
+        with driver_pool.lease() as driver:
+            timings = load_search_results(
+                driver, url, load_more_clicks, (lambda: on_stage(collect(driver))) if on_stage else None
+            )
+            # Collect the results, the WebDriver goes back to the pool afterwards
+            start = time.perf_counter()
+            results = collect(driver)
+            timings['collect'] = time.perf_counter() - start
+            # Read how much the page downloaded, cross-origin responses without timing headers count as 0 bytes
+            network_bytes, page_load = driver.execute_script(NETWORK_STATS_SCRIPT)
     # Exit if the session could not be created
     except SessionNotCreatedException:
         return
 
+    # Log how long every phase of the page loading took and how much data was transferred
+    for phase, duration in timings.items():
+        metrics.observe(f'parser.{phase}', duration)
+    metrics.observe(f'parser.{BROWSER_PROFILE}.network_bytes', network_bytes)
+    metrics.observe(f'parser.{BROWSER_PROFILE}.page_load', page_load / 1000)
+    logging.info(
+        'Loaded search results for %s with %s profile in %s, page load %.2fs, transferred %.1f KiB', destination,
+        BROWSER_PROFILE, ', '.join(f'{phase} {duration:.2f}s' for phase, duration in timings.items()),
+        page_load / 1000, network_bytes / 1024
+    )
+    return results
+
+
+# Function to wait until the number of property cards and network requests stops changing
+def wait_for_cards(driver: webdriver.Chrome, min_cards: int = 0) -> int:
+    deadline = time.monotonic() + PAGE_SETTLE_TIMEOUT
+    last_state = None
+    stable_since = time.monotonic()
+
+    while True:
+        state = driver.execute_script(PAGE_STATE_SCRIPT)
+        now = time.monotonic()
+        cards, _, ready_state = state
+
+        # Restart the quiet period every time new cards appear or a network request finishes
+        if state != last_state:
+            last_state = state
+            stable_since = now
+        elif cards > min_cards and ready_state == 'complete' and now - stable_since >= PAGE_QUIET_PERIOD:
+            return cards
+
+        # Give up waiting after the upper bound and use whatever has been loaded
+        if now >= deadline:
+            return cards
+        time.sleep(PAGE_POLL_INTERVAL)
+
+
+# Function to open the search page, reveal more results and return the phase timings, on_batch is called once the
+# first cards and every further batch of cards have loaded
+def load_search_results(
+    driver: webdriver.Chrome, url: str, load_more_clicks: int, on_batch: Optional[Callable[[], None]] = None
+) -> dict[str, float]:
+    timings = {}
+
+    # Navigate to the URL and wait for the first cards
+    start = time.perf_counter()
+    driver.get(url=url)
+    cards = wait_for_cards(driver)
+    timings['load'] = time.perf_counter() - start
+    if on_batch and load_more_clicks:
+        on_batch()
+
     # Initialize variables for scrolling and loading more results
+    start = time.perf_counter()
     exit_check = 0
     load_more_button_counter = 0
 
     # Scroll the page and attempt to load more results
-    while load_more_button_counter < LOAD_MORE_BUTTON_CLICKS and exit_check < 6:
+    while load_more_button_counter < load_more_clicks and exit_check < 6:
         # Scroll to the bottom of the page
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         # Scroll up a random number of pixels to simulate user behavior
@@ -73,11 +175,13 @@ def parse_booking(
         except NoSuchElementException:
             pass
 
-        # Attempt to reject cookies
+        # Attempt to reject cookies and wait until the banner is gone
         try:
             driver.find_element(By.ID, 'onetrust-reject-all-handler').click()
-            time.sleep(1)
-        except (NoSuchElementException, ElementNotInteractableException):
+            WebDriverWait(driver, 1).until(
+                EC.invisibility_of_element_located((By.ID, 'onetrust-banner-sdk'))
+            )
+        except (NoSuchElementException, ElementNotInteractableException, TimeoutException):
             pass
 
         # Attempt to find and click the 'Load more results' button
@@ -89,63 +193,31 @@ def parse_booking(
             load_more_button.click()
             # Increment the counter
             load_more_button_counter += 1
-            # Wait for the results to load
-            time.sleep(random.uniform(1, 1.25))
+            # Wait until the new cards have been added to the page
+            cards = wait_for_cards(driver, cards)
+            if on_batch and load_more_button_counter < load_more_clicks:
+                on_batch()
             # Reset the exit check counter
             exit_check = 0
         except TimeoutException:
             # Increment the exit check counter if the button is not found
             exit_check += 1
             pass
+    timings['load_more'] = time.perf_counter() - start
 
-    # Pause to ensure all data has loaded
-    time.sleep(random.uniform(1.75, 2))
-    # Retrieve the page source and quit the WebDriver
-    page_source = driver.page_source
-    driver.quit()
-    # Parse the page source with BeautifulSoup
-    soup = BeautifulSoup(page_source, 'html.parser')
-    # Select all property cards from the page
-    properties = soup.select('div[data-testid="property-card"]')
-
-    # Initialize a list to store information about each property
-    info = []
-    # Iterate over each property card and extract information
-    for single_property in properties:
-        name = single_property.select_one('div[data-testid="title"]').text
-        price_element = single_property.select_one('span[data-testid="price-and-discounted-price"]').text
-        price = int(price_element.split('$')[1].replace(',', ''))
-        photo = single_property.select_one('img')['src']
-        link = single_property.select_one('a')['href']
-        rating_element = single_property.select_one('div[data-testid="review-score"]')
-
-        if rating_element:
-            rating = float(rating_element.text.split()[1])
-        else:
-            rating = None
-
-        # Store the extracted information in a dictionary
-        single_info = {
-            'Name': name,
-            'Price': price,
-            'Rating': rating,
-            'Photo': photo,
-            'Link': link
-        }
-        # Add the dictionary to the list
-        info.append(single_info)
-
-    # Return the list of property information
-    return info
+    # Wait until the page stops changing to ensure all data has loaded
+    start = time.perf_counter()
+    wait_for_cards(driver)
+    timings['settle'] = time.perf_counter() - start
+    return timings
 
 
 # Function to create a URL with the specified search parameters
 def create_url(
     destination: str, check_in: str, check_out: str, adults: int,
-    rooms: int, children: int, children_age: list[Optional[int]], order_by: str
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    base_url: str = BOOKING_SEARCH_URL, offset: int = 0
 ) -> str:
-    # Base URL for the search
-    base_url = 'https://www.booking.com/searchresults.html'
     # URL-encode the destination
     destination = quote_plus(destination)
 
@@ -167,6 +239,10 @@ def create_url(
         age_params = '&'.join(f'age={age}' for age in children_age)
         params = f'{params}&{age_params}'
 
+    # Add the offset of the first result for pages after the first one
+    if offset > 0:
+        params = f'{params}&offset={offset}'
+
     # Combine the base URL with the query parameters
     url = f'{base_url}?{params}'
     # Return the constructed URL
@@ -0,0 +1,209 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+from utils.constants import MAX_WORKERS, DRIVER_MAX_USES, USER_AGENT, BROWSER_PROFILE
+from utils.metrics import metrics
+
+
+# File extensions the lean browser profile doesn't download: images, media and fonts
+LEAN_BLOCKED_EXTENSIONS = [
+    'jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'svg', 'ico',
+    'mp4', 'webm', 'mp3',
+    'woff', 'woff2', 'ttf', 'otf', 'eot'
+]
+
+# URL patterns the lean browser profile doesn't download. Chrome matches them against the whole URL, so every extension
+# also gets a pattern with a query string, like the k= and o= parameters of Booking.com photos
+LEAN_BLOCKED_URLS = [
+    pattern for extension in LEAN_BLOCKED_EXTENSIONS for pattern in (f'*.{extension}', f'*.{extension}?*')
+] + [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*bat.bing.com*', '*hotjar.com*', '*criteo.com*',
+    '*criteo.net*', '*adnxs.com*', '*taboola.com*', '*scorecardresearch.com*', '*quantserve.com*'
+]
+
+
+# Function to start a new headless Chrome WebDriver with the given browser profile
+def create_driver(profile: str = BROWSER_PROFILE) -> webdriver.Chrome:
+    # Set up options for the Selenium WebDriver
+    options = Options()
+    # Add incognito mode
+    options.add_argument('--incognito')
+    # Run Chrome in headless mode
+    options.add_argument("--headless=new")
+    # Set the window size
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument("--start-maximized")
+    # Set a user agent to mimic a real browser visit
+    options.add_argument(f'--user-agent={USER_AGENT}')
+
+    if profile == 'lean':
+        # Don't render images and don't ask for notifications, the img src attributes are still in the page
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2
+        })
+
+    driver = webdriver.Chrome(options=options)
+
+    if profile == 'lean':
+        # Block the requests with Chrome DevTools Protocol, so they never leave the browser
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+        except BaseException:
+            # The browser has already started, so quit it instead of leaking the Chrome process
+            driver.quit()
+            raise
+    return driver
+
+
+class PooledDriver:
+    # Wrap a WebDriver together with the number of times it has been leased
+    def __init__(self, driver: webdriver.Chrome) -> None:
+        self.driver = driver
+        self.uses = 0
+
+
+class DriverPool:
+    # Initialize the pool with the maximum number of browsers and uses per browser
+    def __init__(self, size: int, max_uses: int) -> None:
+        self.size = size
+        self.max_uses = max_uses
+        # Warm browsers waiting for the next lease
+        self.idle: list[PooledDriver] = []
+        self.lock = threading.Lock()
+        # Limit the number of browsers that can be alive at the same time
+        self.slots = threading.BoundedSemaphore(size)
+        self.closed = False
+
+    # Lease a warm browser, starting a new one if no idle browser is available
+    @contextmanager
+    def lease(self) -> Iterator[webdriver.Chrome]:
+        start = time.perf_counter()
+        self.slots.acquire()
+        try:
+            pooled = self._take_idle()
+            if pooled:
+                metrics.increment('driver_pool.hits')
+            else:
+                metrics.increment('driver_pool.misses')
+                pooled = PooledDriver(create_driver())
+        except BaseException:
+            self.slots.release()
+            raise
+        metrics.observe('driver_pool.lease_wait', time.perf_counter() - start)
+
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            # The browser has crashed or got into an unknown state, so it is never returned to the pool
+            metrics.increment('driver_pool.crashed')
+            self._quit(pooled)
+            raise
+        except BaseException:
+            # Any other error leaves the page in an unknown state, quit the browser so the Chrome process never leaks
+            metrics.increment('driver_pool.failed')
+            self._quit(pooled)
+            raise
+        else:
+            pooled.uses += 1
+            self._give_back(pooled)
+        finally:
+            self.slots.release()
+
+    # Take the most recently used idle browser that is still alive
+    def _take_idle(self) -> Optional[PooledDriver]:
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                pooled = self.idle.pop()
+            try:
+                # Any call to the browser fails if the session is dead
+                pooled.driver.current_window_handle
+                return pooled
+            except WebDriverException:
+                metrics.increment('driver_pool.crashed')
+                self._quit(pooled)
+
+    # Reset the browser and put it back into the pool or recycle it after too many uses
+    def _give_back(self, pooled: PooledDriver) -> None:
+        if self.closed or pooled.uses >= self.max_uses:
+            metrics.increment('driver_pool.recycled')
+            self._quit(pooled)
+            return
+
+        try:
+            self._reset(pooled.driver)
+        except WebDriverException:
+            metrics.increment('driver_pool.crashed')
+            self._quit(pooled)
+            return
+
+        with self.lock:
+            self.idle.append(pooled)
+
+    # Remove cookies, storage and extra tabs left by the previous lease
+    @staticmethod
+    def _reset(driver: webdriver.Chrome) -> None:
+        handles = driver.window_handles
+        # Close every tab except the first one
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.get('about:blank')
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+            'origin': 'https://www.booking.com',
+            'storageTypes': 'local_storage,session_storage,indexeddb,service_workers'
+        })
+
+    # Quit the browser, ignoring errors from an already dead session
+    @staticmethod
+    def _quit(pooled: PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except WebDriverException:
+            pass
+
+    # Get the pool hit rate and the average lease wait time
+    def stats(self) -> dict[str, float]:
+        hits = metrics.get('driver_pool.hits')
+        misses = metrics.get('driver_pool.misses')
+        lease_wait = metrics.snapshot()['histograms'].get('driver_pool.lease_wait', {})
+        return {
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'leases': hits + misses,
+            'recycled': metrics.get('driver_pool.recycled'),
+            'crashed': metrics.get('driver_pool.crashed'),
+            'failed': metrics.get('driver_pool.failed'),
+            'avg_lease_wait': lease_wait.get('avg', 0.0),
+            'max_lease_wait': lease_wait.get('max', 0.0)
+        }
+
+    # Quit all idle browsers and stop accepting returned ones
+    def close(self) -> None:
+        self.closed = True
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for pooled in idle:
+            self._quit(pooled)
+        logging.info('Driver pool stats: %s', self.stats())
+
+
+# Create a pool with one browser per executor worker
+driver_pool = DriverPool(MAX_WORKERS, DRIVER_MAX_USES)
+
+
+# Function to close the driver pool
+async def driver_pool_shutdown() -> None:
+    driver_pool.close()
@@ -0,0 +1,99 @@
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+from lxml import etree, html
+
+from utils.constants import EXTRACTION_BACKEND
+
+
+# Compiled XPath expressions used by the lxml backend
+PROPERTY_CARDS = etree.XPath('//div[@data-testid="property-card"]')
+CARD_TITLE = etree.XPath('(.//div[@data-testid="title"])[1]')
+CARD_PRICE = etree.XPath('(.//span[@data-testid="price-and-discounted-price"])[1]')
+CARD_PHOTO = etree.XPath('(.//img)[1]/@src')
+CARD_LINK = etree.XPath('(.//a)[1]/@href')
+CARD_RATING = etree.XPath('(.//div[@data-testid="review-score"])[1]')
+
+
+# Function to convert the price text of a card (e.g. 'US$1,234') to an integer
+def parse_price(price_text: str) -> int:
+    return int(price_text.split('$')[1].replace(',', ''))
+
+
+# Function to convert the review score text of a card (e.g. 'Scored 8.6 Very good') to a float
+def parse_rating(rating_text: Optional[str]) -> Optional[float]:
+    if rating_text is None:
+        return None
+    return float(rating_text.split()[1])
+
+
+# Function to get a stable hotel identity from its link, the query string changes with every search
+def get_hotel_key(link: str) -> str:
+    return urlsplit(link).path
+
+
+# Function to extract hotel information with BeautifulSoup, kept as the reference implementation
+def extract_hotels_bs4(page_source: str) -> list[dict]:
+    # Parse the page source with BeautifulSoup
+    soup = BeautifulSoup(page_source, 'html.parser')
+    # Select all property cards from the page
+    properties = soup.select('div[data-testid="property-card"]')
+
+    # Initialize a list to store information about each property
+    info = []
+    # Iterate over each property card and extract information
+    for single_property in properties:
+        rating_element = single_property.select_one('div[data-testid="review-score"]')
+
+        # Store the extracted information in a dictionary
+        single_info = {
+            'Name': single_property.select_one('div[data-testid="title"]').text,
+            'Price': parse_price(single_property.select_one('span[data-testid="price-and-discounted-price"]').text),
+            'Rating': parse_rating(rating_element.text if rating_element else None),
+            'Photo': single_property.select_one('img')['src'],
+            'Link': single_property.select_one('a')['href']
+        }
+        # Add the dictionary to the list
+        info.append(single_info)
+
+    # Return the list of property information
+    return info
+
+
+# Function to extract hotel information with lxml and precompiled XPath expressions
+def extract_hotels_lxml(page_source: str) -> list[dict]:
+    # Parse the page source with the lxml HTML parser
+    tree = html.document_fromstring(page_source)
+
+    # Initialize a list to store information about each property
+    info = []
+    # Iterate over each property card and extract information
+    for single_property in PROPERTY_CARDS(tree):
+        rating_elements = CARD_RATING(single_property)
+
+        # Store the extracted information in a dictionary, missing elements raise IndexError
+        single_info = {
+            'Name': CARD_TITLE(single_property)[0].text_content(),
+            'Price': parse_price(CARD_PRICE(single_property)[0].text_content()),
+            'Rating': parse_rating(rating_elements[0].text_content() if rating_elements else None),
+            'Photo': str(CARD_PHOTO(single_property)[0]),
+            'Link': str(CARD_LINK(single_property)[0])
+        }
+        # Add the dictionary to the list
+        info.append(single_info)
+
+    # Return the list of property information
+    return info
+
+
+# Dictionary mapping backend names to extraction functions
+EXTRACTORS: dict[str, Callable[[str], list[dict]]] = {
+    'lxml': extract_hotels_lxml,
+    'bs4': extract_hotels_bs4
+}
+
+
+# Function to extract hotel information from the page source with the configured backend
+def extract_hotels(page_source: str, backend: str = EXTRACTION_BACKEND) -> list[dict]:
+    return EXTRACTORS[backend](page_source)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+from parsers.booking_parser import create_url
+from parsers.extractors import extract_hotels
+from utils.constants import USER_AGENT, BOOKING_SEARCH_URL, HTTP_MIN_CARDS, HTTP_TIMEOUT
+from utils.metrics import metrics
+from utils.utils import run_in_process
+
+
+# Headers sent with every request to look like the browser used by the Selenium parser
+HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+
+# Fragments that only appear on captcha and bot challenge pages
+BLOCK_PAGE_MARKERS = (
+    'awswaf',
+    'captcha',
+    'challenge-platform',
+    'are you a robot',
+    'access denied'
+)
+
+# HTTP session shared by all searches, created on first use
+session: Optional[aiohttp.ClientSession] = None
+
+
+# Function to get the shared HTTP session
+async def get_session() -> aiohttp.ClientSession:
+    global session
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            headers=HEADERS,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+        )
+    return session
+
+
+# Function to close the shared HTTP session
+async def http_session_shutdown() -> None:
+    if session is not None and not session.closed:
+        await session.close()
+
+
+# Function to check if Booking.com returned a block page instead of search results
+def is_block_page(page_source: str) -> bool:
+    page_source = page_source.lower()
+    return any(marker in page_source for marker in BLOCK_PAGE_MARKERS)
+
+
+# Function to download a search page without a browser
+async def fetch_search_page(url: str) -> Optional[str]:
+    try:
+        http_session = await get_session()
+        async with http_session.get(url) as response:
+            if response.status != 200:
+                logging.info('HTTP fetch got status %s for %s', response.status, url)
+                return None
+            return await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        logging.info('HTTP fetch failed for %s: %r', url, error)
+        return None
+
+
+# Function to fetch hotels with a plain HTTP request, returns None when the Selenium parser is needed
+async def fetch_booking(
+    destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    base_url: str = BOOKING_SEARCH_URL, offset: int = 0, min_cards: int = HTTP_MIN_CARDS
+) -> Optional[list[dict]]:
+    # Generate the URL for the booking site with the given parameters
+    url = create_url(
+        destination, check_in, check_out, adults, rooms, children, children_age, order_by, base_url, offset
+    )
+    page_source = await fetch_search_page(url)
+
+    if page_source is None:
+        metrics.increment('http_fetcher.failed')
+        return None
+    if is_block_page(page_source):
+        metrics.increment('http_fetcher.blocked')
+        return None
+
+    # Extract the hotels in the process executor, so the page is not parsed on the event loop
+    try:
+        hotels = await run_in_process(extract_hotels, page_source)
+    # Cards with an unexpected layout mean the page has to be rendered by the browser
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        metrics.increment('http_fetcher.failed')
+        return None
+
+    # Pages after the first one may legitimately be short or empty at the end of the results
+    if len(hotels) < min_cards:
+        metrics.increment('http_fetcher.too_few_cards')
+        return None
+
+    metrics.increment('http_fetcher.served')
+    return hotels
@@ -0,0 +1,139 @@
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+import aiosqlite
+
+from utils.constants import CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_DB_PATH
+from utils.metrics import metrics
+
+
+# Function to build a canonical cache key from the search parameters used by create_url
+def make_query_key(
+    destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str
+) -> str:
+    return json.dumps([
+        # 'New  York' and 'new york' are the same search for Booking.com
+        ' '.join(destination.split()).casefold(),
+        check_in,
+        check_out,
+        int(adults),
+        int(rooms),
+        int(children),
+        # The order in which the children's ages were entered does not change the results
+        sorted(children_age) if children else [],
+        order_by
+    ], separators=(',', ':'))
+
+
+class SearchCache:
+    # Initialize the in-process LRU tier and the path to the SQLite tier
+    def __init__(self, path: str, ttl: float, max_entries: int) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Cache key mapped to the expiry time and the list of hotels, ordered from least to most recently used
+        self.memory: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+
+    # Create the table of the SQLite tier
+    async def create(self) -> None:
+        async with aiosqlite.connect(self.path) as conn:
+            # WAL lets several bot processes read the cache while one of them writes
+            await conn.execute('PRAGMA journal_mode=WAL')
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    query_key TEXT PRIMARY KEY,
+                    hotels TEXT,
+                    expires_at REAL
+                )
+            ''')
+            await conn.commit()
+
+    # Get cached hotels for the given key or None if there is no fresh entry
+    async def get(self, key: str) -> Optional[list[dict]]:
+        now = time.time()
+
+        # Look in the in-process tier first
+        entry = self.memory.get(key)
+        if entry:
+            expires_at, hotels = entry
+            if expires_at > now:
+                self.memory.move_to_end(key)
+                metrics.increment('cache.memory_hits')
+                return list(hotels)
+            del self.memory[key]
+            metrics.increment('cache.evictions')
+
+        # Fall back to the SQLite tier, which may have been filled by another process
+        try:
+            async with aiosqlite.connect(self.path) as conn:
+                async with conn.execute('''
+                    SELECT hotels, expires_at FROM search_cache
+                    WHERE query_key = ? AND expires_at > ?
+                ''', (key, now)) as cur:
+                    row = await cur.fetchone()
+        except aiosqlite.Error as error:
+            logging.warning('Search cache read failed: %r', error)
+            row = None
+
+        if not row:
+            metrics.increment('cache.misses')
+            return None
+
+        hotels, expires_at = json.loads(row[0]), row[1]
+        # Promote the entry to the in-process tier with its remaining lifetime
+        self._remember(key, hotels, expires_at)
+        metrics.increment('cache.sqlite_hits')
+        return list(hotels)
+
+    # Store hotels for the given key in both tiers
+    async def set(self, key: str, hotels: list[dict]) -> None:
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(key, list(hotels), expires_at)
+
+        try:
+            async with aiosqlite.connect(self.path) as conn:
+                await conn.execute('''
+                    INSERT OR REPLACE INTO search_cache (query_key, hotels, expires_at)
+                    VALUES (?, ?, ?)
+                ''', (key, json.dumps(hotels), expires_at))
+                # Remove expired entries, so the file doesn't grow without bound
+                async with conn.execute('''
+                    DELETE FROM search_cache
+                    WHERE expires_at <= ?
+                ''', (now,)) as cur:
+                    metrics.increment('cache.evictions', max(cur.rowcount, 0))
+                await conn.commit()
+        except aiosqlite.Error as error:
+            logging.warning('Search cache write failed: %r', error)
+
+    # Put an entry into the in-process tier, evicting the least recently used entries
+    def _remember(self, key: str, hotels: list[dict], expires_at: float) -> None:
+        self.memory[key] = (expires_at, hotels)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            metrics.increment('cache.evictions')
+
+    # Get the cache counters
+    def stats(self) -> dict[str, float]:
+        return {
+            'memory_hits': metrics.get('cache.memory_hits'),
+            'sqlite_hits': metrics.get('cache.sqlite_hits'),
+            'misses': metrics.get('cache.misses'),
+            'evictions': metrics.get('cache.evictions'),
+            'memory_entries': len(self.memory)
+        }
+
+
+# Create a search cache shared by all handlers
+search_cache = SearchCache(CACHE_DB_PATH, CACHE_TTL, CACHE_MAX_ENTRIES)
+
+
+# Function to log the cache counters when the bot stops
+async def search_cache_shutdown() -> None:
+    logging.info('Search cache stats: %s', search_cache.stats())
@@ -0,0 +1,213 @@
+import time
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+from parsers.booking_parser import fetch_page_source
+from parsers.extractors import extract_hotels, get_hotel_key
+from parsers.http_fetcher import fetch_booking
+from parsers.result_cache import search_cache, make_query_key
+from parsers.sorting import get_scrape_order, sort_hotels
+from utils.constants import (
+    FETCH_MODE, HTTP_MIN_CARDS, LOAD_MORE_BUTTON_CLICKS, PAGINATION_MODE, RESULT_PAGES,
+    RESULTS_PER_PAGE
+)
+from utils.concurrency import controller, scrape_breaker
+from utils.metrics import metrics
+from utils.scheduler import Priority, scheduler
+from utils.single_flight import SingleFlight
+from utils.utils import run_in_executor, run_in_process
+
+
+# Group that lets concurrent identical searches share one scrape
+scrapes = SingleFlight('search.scrapes')
+
+
+# Function to search hotels, using cached results when possible
+async def search_hotels(
+    destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    use_cache: bool = True, user_id: Optional[int] = None, priority: Priority = Priority.BACKGROUND
+) -> Optional[list[dict]]:
+    hotels = []
+    async for stage in search_stages(
+        destination, check_in, check_out, adults, rooms, children, children_age, order_by, use_cache, user_id, priority
+    ):
+        hotels.extend(stage)
+    return sort_hotels(hotels, order_by) if hotels else None
+
+
+# Function to search hotels in stages: the first result page as soon as it is ready, then all hotels found so far
+# after every further page, sorted as a whole, so a locally sorted option places new hotels among the earlier ones
+async def search_hotels_in_stages(
+    destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    use_cache: bool = True, user_id: Optional[int] = None, priority: Priority = Priority.BACKGROUND
+) -> AsyncIterator[list[dict]]:
+    hotels = []
+    async for stage in search_stages(
+        destination, check_in, check_out, adults, rooms, children, children_age, order_by, use_cache, user_id, priority
+    ):
+        hotels = [*hotels, *stage]
+        yield sort_hotels(hotels, order_by)
+
+
+# Function to get the unsorted stages of a search, a cached search is a single stage
+async def search_stages(
+    destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    use_cache: bool = True, user_id: Optional[int] = None, priority: Priority = Priority.BACKGROUND
+) -> AsyncIterator[list[dict]]:
+    # Sorting options served locally share one scrape in the Booking.com order
+    form_values = (
+        destination, check_in, check_out, adults, rooms, children, children_age, get_scrape_order(order_by)
+    )
+    key = make_query_key(*form_values)
+
+    # Return the cached results unless the caller forces a fresh scrape
+    if use_cache:
+        hotels = await search_cache.get(key)
+        if hotels:
+            yield hotels
+            return
+
+    # Join an identical scrape that is already running instead of starting another one, the stages it has already
+    # produced are replayed. The scrape keeps the user and priority of the request that started it
+    async for stage in scrapes.stream(
+        key, lambda: scrape_and_cache(key, *form_values, user_id=user_id, priority=priority)
+    ):
+        yield stage
+
+
+# Function to scrape hotels in stages and store the successful results in the cache
+async def scrape_and_cache(
+    key: str, destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    user_id: Optional[int] = None, priority: Priority = Priority.BACKGROUND
+) -> AsyncIterator[list[dict]]:
+    hotels = []
+    async for stage in scrape_hotels(
+        destination, check_in, check_out, adults, rooms, children, children_age, order_by, user_id, priority
+    ):
+        hotels.extend(stage)
+        yield stage
+
+    # Only successful searches are cached, so a failed scrape is retried next time
+    if hotels:
+        await search_cache.set(key, hotels)
+
+
+# Function to scrape hotels in stages, either fetching result pages by offset concurrently or clicking
+# 'Load more results', every stage holds only the hotels not seen in the earlier ones
+async def scrape_hotels(
+    destination: str, check_in: str, check_out: str, adults: int,
+    rooms: int, children: int, children_age: list[Optional[int]], order_by: str,
+    user_id: Optional[int] = None, priority: Priority = Priority.BACKGROUND
+) -> AsyncIterator[list[dict]]:
+    form_values = (destination, check_in, check_out, adults, rooms, children, children_age, order_by)
+    seen = set()
+
+    if PAGINATION_MODE == 'offset':
+        # Fetch all result pages at once, so deep searches take about as long as the slowest page
+        tasks = [
+            asyncio.ensure_future(scrape_page(
+                form_values, page * RESULTS_PER_PAGE, HTTP_MIN_CARDS if page == 0 else 0, 0, user_id, priority
+            ))
+            for page in range(RESULT_PAGES)
+        ]
+        try:
+            # Publish the pages in order, a page that finished early waits for the pages before it
+            for task in tasks:
+                hotels = new_hotels(await task, seen)
+                if hotels:
+                    yield hotels
+        finally:
+            # Stop the remaining pages if the search failed or was cancelled
+            for task in tasks:
+                task.cancel()
+        return
+
+    # Publish the hotels of every 'Load more results' batch as soon as the browser thread reports its page source
+    loop = asyncio.get_running_loop()
+    stages = asyncio.Queue()
+    task = asyncio.ensure_future(scrape_page(
+        form_values, 0, HTTP_MIN_CARDS, LOAD_MORE_BUTTON_CLICKS, user_id, priority,
+        lambda page_source: loop.call_soon_threadsafe(stages.put_nowait, page_source)
+    ))
+    task.add_done_callback(lambda _: stages.put_nowait(None))
+    try:
+        while (page_source := await stages.get()) is not None:
+            hotels = new_hotels(await run_in_process(extract_hotels, page_source), seen)
+            if hotels:
+                yield hotels
+        # The final result also covers the HTTP fast path and the page source mode, which have no batches
+        hotels = new_hotels(task.result(), seen)
+        if hotels:
+            yield hotels
+    finally:
+        task.cancel()
+
+
+# Function to scrape a single result page, trying the HTTP fast path before the Selenium parser
+async def scrape_page(
+    form_values: tuple, offset: int, min_cards: int, load_more_clicks: int,
+    user_id: Optional[int] = None, priority: Priority = Priority.BACKGROUND,
+    on_stage: Optional[Callable[[str], None]] = None
+) -> Optional[list[dict]]:
+    # Download the page directly on the event loop, without taking an executor slot
+    if FETCH_MODE == 'http':
+        hotels = await fetch_booking(*form_values, offset=offset, min_cards=min_cards)
+        if hotels is not None:
+            return hotels
+        metrics.increment('search.browser_fallbacks')
+
+    # Fail fast while Booking.com keeps failing, instead of piling up browser sessions that time out
+    if not scrape_breaker.allow():
+        return None
+
+    # Browser work waits for a thread executor slot in the scheduler, so one user's bulk refresh can't hold every
+    # worker, and the number of slots follows how well Booking.com copes with the load. First pages go ahead of the
+    # deeper pages of the same user, so every search of a form gets its info panel before the others grow
+    async with scheduler.slot(user_id, priority, first_page=offset == 0):
+        start = time.perf_counter()
+        try:
+            # Render the page with Selenium in the thread executor, the browser work is I/O bound. The page source
+            # after every 'Load more results' batch is passed to on_stage on the way
+            page_source = await run_in_executor(
+                fetch_page_source, *form_values, offset, load_more_clicks, on_stage
+            )
+        except Exception:
+            controller.record(time.perf_counter() - start, False)
+            scrape_breaker.record(False)
+            # The first page must succeed, a deeper page that fails is skipped like an empty one, so the search keeps
+            # the pages it has
+            if offset == 0:
+                raise
+            logging.warning('Skipped result page at offset %s', offset, exc_info=True)
+            metrics.increment('search.failed_pages')
+            return None
+        elapsed = time.perf_counter() - start
+
+    hotels = None
+    if page_source is not None:
+        # Extract hotels in the process executor, so parsing doesn't hold the GIL of the bot process
+        start = time.perf_counter()
+        hotels = await run_in_process(extract_hotels, page_source)
+        metrics.observe('parser.extract', time.perf_counter() - start)
+
+    # The first page must have hotels, deeper pages may be empty at the end of the results
+    success = hotels is not None and (offset > 0 or bool(hotels))
+    controller.record(elapsed, success)
+    scrape_breaker.record(success)
+    return hotels
+
+
+# Function to pick the hotels not seen on earlier pages or stages, keeping their order
+def new_hotels(hotels: Optional[list[dict]], seen: set[str]) -> list[dict]:
+    fresh = []
+    for hotel in hotels or []:
+        key = get_hotel_key(hotel.get('Link'))
+        if key not in seen:
+            seen.add(key)
+            fresh.append(hotel)
+    return fresh
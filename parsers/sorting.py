@@ -0,0 +1,43 @@
+from typing import Any, Callable
+
+from utils.constants import SORT_OPTIONS_SOURCE, LOCAL_SORT_BASE_ORDER
+
+
+# Function to get the sort key for 'Price (lowest first)'
+def price_key(hotel: dict) -> tuple:
+    return (hotel.get('Price'),)
+
+
+# Function to get the sort key for 'Top Reviewed', hotels without rating go last and cheaper hotels win ties
+def rating_key(hotel: dict) -> tuple:
+    rating = hotel.get('Rating')
+    return (rating is None, -(rating or 0), hotel.get('Price'))
+
+
+# Function to get the sort key for 'Best reviewed & lowest price', the best rating per dollar goes first
+def rating_and_price_key(hotel: dict) -> tuple:
+    rating = hotel.get('Rating')
+    return (rating is None, -(rating or 0) / max(hotel.get('Price') or 1, 1), hotel.get('Price'))
+
+
+# Dictionary mapping locally served sorting options to their sort keys
+LOCAL_SORT_KEYS: dict[str, Callable[[dict], Any]] = {
+    'price': price_key,
+    'bayesian_review_score': rating_key,
+    'review_score_and_price': rating_and_price_key
+}
+
+
+# Function to get the sorting option that has to be requested from Booking.com for the given option
+def get_scrape_order(order_by: str) -> str:
+    if SORT_OPTIONS_SOURCE.get(order_by) == 'local':
+        return LOCAL_SORT_BASE_ORDER
+    return order_by
+
+
+# Function to sort scraped hotels locally if the option is served locally, the sort is stable,
+# so hotels with equal keys keep the Booking.com order
+def sort_hotels(hotels: list[dict], order_by: str) -> list[dict]:
+    if SORT_OPTIONS_SOURCE.get(order_by) != 'local':
+        return hotels
+    return sorted(hotels, key=LOCAL_SORT_KEYS[order_by])
@@ -0,0 +1,106 @@
+import time
+import logging
+
+from utils.constants import (
+    MAX_WORKERS, MIN_SCRAPE_CONCURRENCY, SLOW_SCRAPE_TIME, BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN
+)
+from utils.metrics import metrics
+from utils.scheduler import ScrapeScheduler, scheduler
+
+
+class ConcurrencyController:
+    # Initialize the controller with the scheduler whose number of slots it adjusts
+    def __init__(self, scheduler: ScrapeScheduler, min_limit: int, max_limit: int, slow_time: float) -> None:
+        self.scheduler = scheduler
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.slow_time = slow_time
+        # The limit grows by fractions of a slot, the scheduler gets the whole part
+        self.limit = float(max_limit)
+        self.last_decrease = 0.0
+        self.apply()
+
+    # Adjust the limit after a finished scrape: add a slot after a full round of good scrapes, halve it on trouble
+    def record(self, elapsed: float, success: bool) -> None:
+        if success and elapsed <= self.slow_time:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        else:
+            # Scrapes that were running together fail together, so halve the limit at most once per slow scrape time
+            now = time.monotonic()
+            if now - self.last_decrease < self.slow_time:
+                return
+            self.last_decrease = now
+            self.limit = max(self.min_limit, self.limit / 2)
+        self.apply()
+
+    # Pass the whole part of the limit to the scheduler
+    def apply(self) -> None:
+        limit = int(self.limit)
+        if limit != self.scheduler.limit:
+            logging.info('Scrape concurrency changed from %s to %s', self.scheduler.limit, limit)
+            self.scheduler.limit = limit
+            # Start waiting scrapes if the limit went up
+            self.scheduler.dispatch()
+        metrics.set_gauge('scheduler.limit', limit)
+
+
+class CircuitBreaker:
+    # Numbers used for the state gauge
+    STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+    # Initialize a closed breaker with a name used as the metrics prefix
+    def __init__(self, name: str, failure_threshold: int, cooldown: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        metrics.set_gauge(f'{self.name}.state', self.STATES[self.state])
+
+    # Check whether a new call may go through, an open breaker lets a single trial call through after the cool-down
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == 'open' and now - self.opened_at >= self.cooldown:
+            self.set_state('half_open')
+            self.trial_started = now
+            return True
+        # A trial that never reported back doesn't keep the breaker half-open forever
+        if self.state == 'half_open' and now - self.trial_started >= self.cooldown:
+            self.trial_started = now
+            return True
+        if self.state != 'closed':
+            metrics.increment(f'{self.name}.rejected')
+            return False
+        return True
+
+    # Record the result of a call that went through
+    def record(self, success: bool) -> None:
+        if success:
+            self.failures = 0
+            if self.state != 'closed':
+                self.set_state('closed')
+            return
+
+        self.failures += 1
+        if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self.set_state('open')
+
+    # Change the state and report it in the log and metrics
+    def set_state(self, state: str) -> None:
+        if state == 'open':
+            metrics.increment(f'{self.name}.opened')
+            logging.warning(
+                '%s opened after %s failures, failing fast for %ss', self.name, self.failures, self.cooldown
+            )
+        else:
+            logging.info('%s changed from %s to %s', self.name, self.state, state)
+        self.state = state
+        metrics.set_gauge(f'{self.name}.state', self.STATES[state])
+
+
+# Create the controller of the scrape scheduler and the breaker guarding browser scrapes
+controller = ConcurrencyController(scheduler, MIN_SCRAPE_CONCURRENCY, MAX_WORKERS, SLOW_SCRAPE_TIME)
+scrape_breaker = CircuitBreaker('scrape_breaker', BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN)
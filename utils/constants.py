@@ -1,15 +1,118 @@
 # Maximum number of workers for ThreadPoolExecutor
 MAX_WORKERS = 8
 
+# Maximum number of worker processes extracting hotels and building exports, at most one per CPU core
+MAX_PROCESS_WORKERS = 4
+
+# How many browser scrapes of a single user may run at once, the rest of the workers stay free for other users
+USER_MAX_SCRAPES = 3
+
+# Lower bound of concurrent browser scrapes when Booking.com slows down or fails, the upper bound is MAX_WORKERS
+MIN_SCRAPE_CONCURRENCY = 1
+
+# Time in seconds after which a browser scrape counts as slow and lowers the concurrency
+SLOW_SCRAPE_TIME = 20
+
+# Number of failed browser scrapes in a row after which new scrapes fail fast
+BREAKER_FAILURE_THRESHOLD = 5
+
+# Time in seconds new browser scrapes fail fast before a single trial scrape is let through
+BREAKER_COOLDOWN = 60
+
+# How many searches a pooled Chrome WebDriver serves before it is restarted
+DRIVER_MAX_USES = 20
+
 # Constant for the minimum refresh interval in seconds
 MIN_REFRESH_TIME = 30
 
 # Constant for the maximum amount of information panel by user
 MAX_PANELS = 6
 
+# Booking.com image size sent to Telegram instead of the size found on the search page, e.g. 'max500' or 'square600'
+PHOTO_SIZE = 'max500'
+
+# How often in seconds the expiry scheduler checks for expired info panels when none is due earlier
+EXPIRY_CHECK_INTERVAL = 3600
+
+# How many expired info panels are deleted in one batch
+EXPIRY_BATCH_SIZE = 50
+
+# Pause in seconds between batches of expired info panels, so deletion never crowds out interactive traffic
+EXPIRY_BATCH_DELAY = 5
+
+# Pause in seconds between deleting the chat messages of expired info panels
+EXPIRY_MESSAGE_DELAY = 0.5
+
+# How many free database pages are returned to the file system after every batch
+EXPIRY_VACUUM_PAGES = 1000
+
+# Share of the last price a hotel has to get cheaper by on a refresh before the user is notified, e.g. 0.1 for 10%
+PRICE_DROP_THRESHOLD = 0.1
+
+# Maximum number of hotels listed in a single price drop notification
+PRICE_DROP_ALERT_LIMIT = 5
+
 # How many times parser will click on 'Load More' button in Booking.com
 LOAD_MORE_BUTTON_CLICKS = 2
 
+# How deeper results are loaded: 'offset' fetches result pages concurrently, 'load_more' clicks the button one by one
+PAGINATION_MODE = 'offset'
+
+# How many result pages are fetched in the 'offset' mode
+RESULT_PAGES = 3
+
+# Number of hotels on a single Booking.com result page
+RESULTS_PER_PAGE = 25
+
+# Browser profile of the Selenium parser: 'lean' skips images, media, fonts and trackers, 'full' downloads everything
+BROWSER_PROFILE = 'lean'
+
+# User agent sent to Booking.com to mimic a real browser visit
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+    'AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/123.0.0.0 Safari/537.36'
+)
+
+# Upper bound in seconds for waiting until the search page stops changing
+PAGE_SETTLE_TIMEOUT = 5
+
+# Time in seconds without new cards or network requests after which the page is considered loaded
+PAGE_QUIET_PERIOD = 0.4
+
+# Interval in seconds between checks of the search page state
+PAGE_POLL_INTERVAL = 0.1
+
+# Address of the Booking.com search results page
+BOOKING_SEARCH_URL = 'https://www.booking.com/searchresults.html'
+
+# How search pages are fetched: 'http' tries a plain HTTP request first, 'browser' always uses Selenium
+FETCH_MODE = 'http'
+
+# Minimum number of hotels the HTTP fetch has to find, otherwise the search falls back to Selenium
+HTTP_MIN_CARDS = 10
+
+# Timeout in seconds for a single HTTP request to Booking.com
+HTTP_TIMEOUT = 15
+
+# How long in seconds search results are served from the cache
+CACHE_TTL = 600
+
+# Maximum number of searches kept in the in-process cache
+CACHE_MAX_ENTRIES = 256
+
+# Bytes of the bot database SQLite reads through a memory map instead of read calls
+DB_MMAP_SIZE = 64 * 1024 * 1024
+
+# Bytes of database pages SQLite keeps in memory for each connection
+DB_CACHE_SIZE = 16 * 1024 * 1024
+
+# SQLite file of the search cache, shared by all bot processes on the host
+CACHE_DB_PATH = 'search_cache.db'
+
+# Library used to extract hotels from search pages: 'lxml' (fast) or 'bs4' (reference)
+EXTRACTION_BACKEND = 'lxml'
+
 # Dictionary mapping sorting options to their descriptions from Booking.com
 SORT_OPTIONS_DESCRIPTIONS = {
     'popularity': 'Top picks for long stays',
@@ -22,3 +125,21 @@ SORT_OPTIONS_DESCRIPTIONS = {
     'distance_from_search': 'Distance From Downtown',
     'bayesian_review_score': 'Top Reviewed'
 }
+
+# Dictionary mapping sorting options to where they are applied: 'local' options are reproduced from the scraped price
+# and rating, so one scrape serves all of them, 'remote' options depend on Booking.com signals (popularity, property
+# type, star class, distance) and are requested from the site
+SORT_OPTIONS_SOURCE = {
+    'popularity': 'remote',
+    'upsort_bh': 'remote',
+    'price': 'local',
+    'review_score_and_price': 'local',
+    'class': 'remote',
+    'class_asc': 'remote',
+    'class_and_price': 'remote',
+    'distance_from_search': 'remote',
+    'bayesian_review_score': 'local'
+}
+
+# Sorting option used to scrape searches that are sorted locally
+LOCAL_SORT_BASE_ORDER = 'popularity'
@@ -0,0 +1,118 @@
+import heapq
+import asyncio
+import logging
+import datetime
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+
+from database.db_class import DataBase
+from utils.constants import (
+    EXPIRY_BATCH_SIZE, EXPIRY_BATCH_DELAY, EXPIRY_CHECK_INTERVAL, EXPIRY_MESSAGE_DELAY, EXPIRY_VACUUM_PAGES
+)
+from utils.metrics import metrics
+
+
+class ExpiryScheduler:
+    # Initialize an empty min-heap of (expiry time, info panel id, user id, message id) entries
+    def __init__(self, batch_size: int, batch_delay: float, check_interval: float, message_delay: float,
+                 vacuum_pages: int) -> None:
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.check_interval = check_interval
+        self.message_delay = message_delay
+        self.vacuum_pages = vacuum_pages
+        self.heap: list[tuple[datetime.datetime, int, int, int]] = []
+        self.task: Optional[asyncio.Task] = None
+
+    # Add an info panel, it expires when its check-in date has passed, the same rule Refresh and /refresh_all use
+    def add(self, info_panel_id: int, user_id: int, message_id: int, check_in: str) -> None:
+        expires_at = datetime.datetime.strptime(check_in, '%Y-%m-%d') + datetime.timedelta(days=1)
+        heapq.heappush(self.heap, (expires_at, info_panel_id, user_id, message_id))
+        metrics.set_gauge('expiry.scheduled', len(self.heap))
+
+    # Load the info panels from the database and start deleting expired ones in the background
+    async def start(self, bot: Bot, db: DataBase) -> None:
+        for info_panel in await db.get_all_info_panels_check_in():
+            self.add(
+                info_panel.get('info_panel_id'), info_panel.get('user_id'),
+                info_panel.get('message_id'), info_panel.get('check_in')
+            )
+        self.task = asyncio.create_task(self.run(bot, db))
+
+    # Stop the background task
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    # Take up to a batch of expired entries from the heap
+    def pop_expired(self) -> list[tuple[datetime.datetime, int, int, int]]:
+        now = datetime.datetime.now()
+        expired = []
+        while self.heap and self.heap[0][0] <= now and len(expired) < self.batch_size:
+            expired.append(heapq.heappop(self.heap))
+        metrics.set_gauge('expiry.scheduled', len(self.heap))
+        return expired
+
+    # Delete expired info panels batch by batch, sleeping between batches and until the next panel expires
+    async def run(self, bot: Bot, db: DataBase) -> None:
+        while True:
+            expired = self.pop_expired()
+            if not expired:
+                # Sleep until the next panel expires, but check regularly in case the clock has jumped
+                delay = self.check_interval
+                if self.heap:
+                    delay = min(delay, (self.heap[0][0] - datetime.datetime.now()).total_seconds())
+                await asyncio.sleep(max(delay, 0))
+                continue
+
+            try:
+                await self.delete_batch(bot, db, [entry[1] for entry in expired])
+            except Exception:
+                logging.exception('Failed to delete expired info panels')
+            # Leave the database and the Bot API to interactive traffic between batches
+            await asyncio.sleep(self.batch_delay)
+
+    # Delete a batch of expired info panels from the database and the chats, then compact the database file
+    async def delete_batch(self, bot: Bot, db: DataBase, info_panel_ids: list[int]) -> None:
+        # Users may have deleted some of the panels already
+        info_panels = await db.get_info_panels_by_ids(info_panel_ids)
+        await db.delete_info_panels([info_panel.get('info_panel_id') for info_panel in info_panels])
+        await db.delete_unused_hotels()
+        free_pages = await db.incremental_vacuum(self.vacuum_pages)
+        metrics.increment('expiry.deleted', len(info_panels))
+        logging.info('Deleted %s expired info panels, %s free pages left', len(info_panels), free_pages)
+
+        for info_panel in info_panels:
+            chat_id = info_panel.get('user_id')
+            message_id = info_panel.get('message_id')
+            try:
+                await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            except TelegramBadRequest:
+                # Bots can't delete messages older than 48 hours, so mark the panel as expired instead
+                try:
+                    await bot.edit_message_caption(
+                        chat_id=chat_id, message_id=message_id,
+                        caption='Data has been expired. Info panel has been deleted.', reply_markup=None
+                    )
+                except TelegramBadRequest:
+                    pass
+            await asyncio.sleep(self.message_delay)
+
+
+# Create the expiry scheduler with the batch size and delays from constants
+expiry_scheduler = ExpiryScheduler(
+    EXPIRY_BATCH_SIZE, EXPIRY_BATCH_DELAY, EXPIRY_CHECK_INTERVAL, EXPIRY_MESSAGE_DELAY, EXPIRY_VACUUM_PAGES
+)
+
+
+# Function to stop deleting expired info panels
+async def expiry_shutdown() -> None:
+    await expiry_scheduler.stop()
@@ -0,0 +1,57 @@
+import io
+import csv
+import itertools
+from typing import Iterable, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from database.db_class import HOTELS_INFO_COLUMNS, iter_hotels_info
+
+
+# Function to write rows to an Excel workbook in memory, the write-only mode keeps only the current row in memory
+def write_excel(rows: Iterable[tuple]) -> bytes:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Hotels')
+    header = []
+    for column in HOTELS_INFO_COLUMNS:
+        cell = WriteOnlyCell(sheet, value=column)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Function to write rows to a CSV file in memory, with a byte order mark so Excel detects UTF-8
+def write_csv(rows: Iterable[tuple]) -> bytes:
+    buffer = io.BytesIO()
+    text = io.TextIOWrapper(buffer, encoding='utf-8-sig', newline='')
+    writer = csv.writer(text)
+    writer.writerow(HOTELS_INFO_COLUMNS)
+    writer.writerows(rows)
+    text.flush()
+    return buffer.getvalue()
+
+
+# Dictionary mapping export formats to their writers and file names
+EXPORT_FORMATS = {
+    'excel': (write_excel, 'hotels_info.xlsx'),
+    'csv': (write_csv, 'hotels_info.csv')
+}
+
+
+# Function to export the hotels of all info panels of a user, streamed straight from the database cursor, returns
+# None if the user has no hotels, runs in the process executor so it never blocks the event loop
+def export_hotels_info(path: str, user_id: int, order_by: str, file_format: str) -> Optional[bytes]:
+    rows = iter_hotels_info(path, user_id, order_by)
+    first_row = next(rows, None)
+    if first_row is None:
+        return None
+    write, _ = EXPORT_FORMATS[file_format]
+    return write(itertools.chain((first_row,), rows))
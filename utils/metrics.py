@@ -0,0 +1,84 @@
+import logging
+import threading
+from typing import Any
+
+
+# Upper bounds (in seconds) of the histogram buckets
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Metrics:
+    # Initialize empty counters, gauges and histograms
+    def __init__(self) -> None:
+        # Metrics are updated from executor threads, so every change goes through the lock
+        self._lock = threading.Lock()
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, dict[str, Any]] = {}
+
+    # Increase a counter by the given value
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # Set a gauge to the given value
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    # Record a single observation in a histogram
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.setdefault(name, {
+                'count': 0,
+                'sum': 0.0,
+                'max': 0.0,
+                'buckets': [0] * (len(HISTOGRAM_BUCKETS) + 1)
+            })
+            histogram['count'] += 1
+            histogram['sum'] += value
+            histogram['max'] = max(histogram['max'], value)
+
+            # Find the first bucket the value fits in, the last bucket collects everything above the bounds
+            for index, bound in enumerate(HISTOGRAM_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+                    break
+            else:
+                histogram['buckets'][-1] += 1
+
+    # Get the current value of a counter
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self.counters.get(name, 0)
+
+    # Get a copy of all the collected metrics
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {
+                    name: {
+                        'count': histogram['count'],
+                        'avg': histogram['sum'] / histogram['count'] if histogram['count'] else 0.0,
+                        'max': histogram['max'],
+                        'buckets': dict(zip(
+                            [*map(str, HISTOGRAM_BUCKETS), 'inf'], histogram['buckets']
+                        ))
+                    } for name, histogram in self.histograms.items()
+                }
+            }
+
+    # Write all the collected metrics to the log
+    def log_snapshot(self) -> None:
+        logging.info('Metrics: %s', self.snapshot())
+
+
+# Create a metrics registry shared by the whole bot
+metrics = Metrics()
+
+
+# Function to write all the collected metrics to the log when the bot stops
+async def metrics_shutdown() -> None:
+    metrics.log_snapshot()
@@ -0,0 +1,133 @@
+import time
+import asyncio
+from enum import IntEnum
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable, Optional
+
+from utils.constants import MAX_WORKERS, USER_MAX_SCRAPES
+from utils.metrics import metrics
+
+
+class Priority(IntEnum):
+    # The user pressed 'Refresh' on a single info panel and is watching it
+    INTERACTIVE = 0
+    # The user has just submitted a form and waits for new info panels
+    NEW_FORM = 1
+    # The user refreshes all info panels at once with /refresh_all
+    BULK_REFRESH = 2
+    # Nobody is waiting for the result
+    BACKGROUND = 3
+
+
+class ScrapeScheduler:
+    # Initialize the scheduler with the total number of slots and the number of slots a single user may hold
+    def __init__(self, limit: int, user_limit: int) -> None:
+        self.limit = limit
+        self.user_limit = user_limit
+        self.running = 0
+        self.running_by_user: dict[Hashable, int] = {}
+        # For every priority class, users in round-robin order mapped to their waiting requests
+        self.queues: dict[Priority, OrderedDict[Hashable, deque[asyncio.Future]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        # Waiting requests for the first result page of a search
+        self.first_pages: set[asyncio.Future] = set()
+
+    # Wait for a free slot, higher priority classes first and users of one class in turns
+    @asynccontextmanager
+    async def slot(self, user_id: Hashable, priority: Priority, first_page: bool = False) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self.queues[priority].setdefault(user_id, deque())
+        # A first page goes after the first pages and before the deeper pages the user is already waiting for
+        if first_page:
+            waiters.insert(sum(queued in self.first_pages for queued in waiters), waiter)
+            self.first_pages.add(waiter)
+        else:
+            waiters.append(waiter)
+        self.update_queue_depth(priority)
+        self.dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot may have been granted right before the cancellation, give it to the next request
+            if waiter.cancelled():
+                self.remove_waiter(user_id, priority, waiter)
+            else:
+                self.release(user_id)
+            raise
+        metrics.observe(f'scheduler.wait.{priority.name.lower()}', time.perf_counter() - start)
+
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    # Grant free slots to waiting requests
+    def dispatch(self) -> None:
+        while self.running < self.limit:
+            next_waiter = self.pop_next_waiter()
+            if next_waiter is None:
+                break
+            user_id, waiter = next_waiter
+            self.running += 1
+            self.running_by_user[user_id] = self.running_by_user.get(user_id, 0) + 1
+            waiter.set_result(None)
+        metrics.set_gauge('scheduler.running', self.running)
+
+    # Find the oldest request of the next user in the highest priority class that is under the per-user limit. If only
+    # users at the limit are waiting, users watching their screen borrow the free slots instead of leaving them idle,
+    # the limit holds again as soon as another user waits. Bulk and background work stay at the limit, so a Refresh of
+    # another user still finds a free slot
+    def pop_next_waiter(self) -> Optional[tuple[Hashable, asyncio.Future]]:
+        for borrow in (False, True):
+            for priority, users in self.queues.items():
+                if borrow and priority >= Priority.BULK_REFRESH:
+                    break
+                for user_id in list(users):
+                    if not borrow and self.running_by_user.get(user_id, 0) >= self.user_limit:
+                        continue
+                    waiters = users[user_id]
+                    waiter = waiters.popleft()
+                    self.first_pages.discard(waiter)
+                    # Move the user to the end of the line, so other users of the class go next
+                    if waiters:
+                        users.move_to_end(user_id)
+                    else:
+                        del users[user_id]
+                    self.update_queue_depth(priority)
+                    if borrow:
+                        metrics.increment('scheduler.borrowed_slots')
+                    return user_id, waiter
+        return None
+
+    # Return the slot of a finished request and hand it to the next one
+    def release(self, user_id: Hashable) -> None:
+        self.running -= 1
+        self.running_by_user[user_id] -= 1
+        if not self.running_by_user[user_id]:
+            del self.running_by_user[user_id]
+        self.dispatch()
+
+    # Remove a cancelled request from the queue
+    def remove_waiter(self, user_id: Hashable, priority: Priority, waiter: asyncio.Future) -> None:
+        self.first_pages.discard(waiter)
+        waiters = self.queues[priority].get(user_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self.queues[priority][user_id]
+        self.update_queue_depth(priority)
+
+    # Publish the number of waiting requests of a priority class
+    def update_queue_depth(self, priority: Priority) -> None:
+        metrics.set_gauge(
+            f'scheduler.queue_depth.{priority.name.lower()}',
+            sum(len(waiters) for waiters in self.queues[priority].values())
+        )
+
+
+# Create a scheduler with one slot per executor worker, so the executor's own FIFO queue stays empty
+scheduler = ScrapeScheduler(MAX_WORKERS, USER_MAX_SCRAPES)
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Optional
+
+from utils.metrics import metrics
+
+
+class Stream:
+    # Initialize an empty stream of published items
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    # Append an item and wake everyone waiting for the next one
+    def publish(self, item: Any) -> None:
+        self.items.append(item)
+        self.wake()
+
+    # Wake the current waiters, later waiters wait for the next change
+    def wake(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    # Initialize the group with a name used as the metrics prefix
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # Key mapped to the stream that is currently producing the results for it
+        self.streams: dict[str, Stream] = {}
+
+    # Iterate over the items of the async iterator for the key, or join the same key already being iterated and
+    # replay the items published so far
+    async def stream(self, key: str, func: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        stream = self.streams.get(key)
+        if stream is None:
+            metrics.increment(f'{self.name}.started')
+            stream = Stream()
+            stream.task = asyncio.ensure_future(self.publish(stream, func()))
+            self.streams[key] = stream
+            # Forget the key only when the work is finished, even if every reader stopped early
+            stream.task.add_done_callback(lambda _: self.streams.pop(key, None))
+        else:
+            metrics.increment(f'{self.name}.coalesced')
+
+        index = 0
+        while True:
+            changed = stream.changed
+            while index < len(stream.items):
+                yield stream.items[index]
+                index += 1
+            if stream.task.done():
+                # Raise the error of the shared work, if any
+                stream.task.result()
+                return
+            # Wait for the next item without touching the shared task, so one cancelled reader doesn't cancel it
+            await changed.wait()
+
+    # Drive the async iterator in a task of its own and publish its items to the stream
+    @staticmethod
+    async def publish(stream: Stream, iterator: AsyncIterator[Any]) -> None:
+        try:
+            async for item in iterator:
+                stream.publish(item)
+        finally:
+            stream.wake()
@@ -1,13 +1,30 @@
+import os
+import re
 import asyncio
+import multiprocessing
 from datetime import datetime
-from typing import Any, Callable
-from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Union
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-from utils.constants import MAX_WORKERS
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
 
+from database.db_class import DataBase
+from utils.constants import MAX_WORKERS, MAX_PROCESS_WORKERS, PHOTO_SIZE, PRICE_DROP_ALERT_LIMIT, PRICE_DROP_THRESHOLD
+from utils.metrics import metrics
 
-# Create a ThreadPoolExecutor with a maximum number of workers from constants
+# Size segment of Booking.com image links, e.g. '/images/hotel/square600/' or '/images/hotel/max1024x768/'
+PHOTO_SIZE_PATTERN = re.compile(r'(/images/hotel/)[a-z]+\d+(?:x\d+)?/')
+
+
+# Create a ThreadPoolExecutor with a maximum number of workers from constants for browser I/O
 executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+# Create a ProcessPoolExecutor with one process per CPU core, up to MAX_PROCESS_WORKERS, for CPU-heavy page parsing,
+# spawned instead of forked because the bot process already runs executor threads
+process_executor = ProcessPoolExecutor(
+    max_workers=min(os.cpu_count() or 1, MAX_PROCESS_WORKERS), mp_context=multiprocessing.get_context('spawn')
+)
 
 
 # Function to run a given function in the executor
@@ -16,11 +33,76 @@ async def run_in_executor(func: Callable[..., Any], *args: Any) -> Any:
     return await loop.run_in_executor(executor, func, *args)
 
 
-# Function to shut down the executor
+# Function to run a given function in the process executor, the function and arguments must be picklable
+async def run_in_process(func: Callable[..., Any], *args: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(process_executor, func, *args)
+
+
+# Function to shut down the executors
 async def executor_shutdown() -> None:
     executor.shutdown(wait=True)
+    process_executor.shutdown(wait=True)
 
 
 # Function to format a date string
 async def format_date(date: str) -> str:
     return datetime.strptime(date, '%Y-%m-%d').strftime('%#d %B %Y')
+
+
+# Function to rewrite a Booking.com image link to the size sent to Telegram, other links are returned unchanged
+def resize_photo(photo: str) -> str:
+    return PHOTO_SIZE_PATTERN.sub(rf'\g<1>{PHOTO_SIZE}/', photo, count=1)
+
+
+# Function to send or edit a hotel photo, reusing the file id Telegram returned for the same photo before
+async def send_hotel_photo(
+    db: DataBase, photo: str, send: Callable[[str], Awaitable[Union[Message, bool]]]
+) -> Union[Message, bool]:
+    file_id = await db.get_photo_file_id(photo)
+    if file_id:
+        try:
+            message = await send(file_id)
+            metrics.increment('photos.file_id_hits')
+            return message
+        except TelegramBadRequest as error:
+            # File ids stop working when the bot token changes, forget the stale one and send the link again
+            if 'file identifier' not in error.message:
+                raise
+            await db.delete_photo_file_id(photo)
+            metrics.increment('photos.stale_file_ids')
+
+    # Let Telegram download the photo once and remember the file id of its largest size
+    message = await send(resize_photo(photo))
+    metrics.increment('photos.url_uploads')
+    if isinstance(message, Message) and message.photo:
+        await db.save_photo_file_id(photo, message.photo[-1].file_id)
+    return message
+
+
+# Function to notify a user about the hotels of a refreshed info panel that got cheaper by more than the threshold
+async def send_price_drops(bot: Bot, chat_id: int, destination: str, price_drops: list[dict[str, Any]]) -> None:
+    price_drops = sorted(
+        (
+            price_drop for price_drop in price_drops
+            if price_drop.get('price') < price_drop.get('old_price') * (1 - PRICE_DROP_THRESHOLD)
+        ),
+        key=lambda price_drop: price_drop.get('price') / price_drop.get('old_price')
+    )
+    if not price_drops:
+        return
+
+    # List the biggest drops in a single message
+    lines = [
+        f'🏨 <b>{price_drop.get("name")}</b>\n'
+        f'💸 {price_drop.get("old_price")}$ → {price_drop.get("price")}$ '
+        f'(-{1 - price_drop.get("price") / price_drop.get("old_price"):.0%})'
+        for price_drop in price_drops[:PRICE_DROP_ALERT_LIMIT]
+    ]
+    if len(price_drops) > PRICE_DROP_ALERT_LIMIT:
+        lines.append(f'...and {len(price_drops) - PRICE_DROP_ALERT_LIMIT} more')
+    await bot.send_message(
+        chat_id=chat_id,
+        text=f'📉 <b>Prices dropped in {destination}</b>\n\n' + '\n\n'.join(lines)
+    )
+    metrics.increment('prices.drop_alerts')